@@ -4,23 +4,117 @@ Client mapping classes for managing connected translation clients.
 Supports both in-memory and DynamoDB-backed storage.
 """
 
+import atexit
 import logging
-from typing import Dict, Optional, Any
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Any, Tuple
 import boto3
+from botocore.config import Config
 from botocore.exceptions import ClientError
 
 logger = logging.getLogger(__name__)
 
+# DynamoDB limits: 25 put/delete requests per BatchWriteItem call and
+# 100 keys per BatchGetItem call
+BATCH_WRITE_LIMIT = 25
+BATCH_GET_LIMIT = 100
+
+# Retry policy for UnprocessedItems/UnprocessedKeys returned by batch calls
+BATCH_MAX_RETRIES = 5
+BATCH_BACKOFF_BASE = 0.05  # seconds
+
+# Upper bound on the background flusher's delay after consecutive failures
+FLUSH_BACKOFF_MAX = 5.0  # seconds
+
+# Pool sized for concurrent broadcast fan-out; keep-alive avoids a TCP/TLS
+# handshake per request on warm Lambda containers. Explicit timeouts bound how
+# long a synchronous flush() can stall a request on a hung connection.
+DYNAMODB_CLIENT_CONFIG = Config(
+    max_pool_connections=64,
+    tcp_keepalive=True,
+    connect_timeout=2,
+    read_timeout=5,
+    retries={"max_attempts": 5, "mode": "adaptive"},
+)
+
+
+@dataclass(slots=True)
+class ClientInfo:
+    """
+    Per-client state held in the local cache.
+
+    A slotted dataclass is several times smaller than an equivalent dict,
+    which matters with thousands of open connections.
+    """
+
+    lang: str = "en"
+    ws: Any = None
+
 
 class TranslationClientMap:
     """
     Base class for managing client-to-language mappings.
     Uses an in-memory dictionary for storage.
+
+    Mutations are serialized by a reentrant lock. Single-key reads rely on
+    dict operations being atomic and take no lock; use snapshot() to
+    iterate safely while other threads add or remove clients.
+
+    Clients are also indexed by language so broadcasts can enumerate the
+    active languages without walking every client. The index maps each
+    language to an insertion-ordered dict of client IDs (values unused).
     """
 
     def __init__(self):
         """Initialize the client map with an empty dictionary."""
-        self._clients: Dict[Any, Dict[str, Any]] = {}
+        self._clients: Dict[Any, ClientInfo] = {}
+        self._by_lang: Dict[str, Dict[Any, None]] = {}
+        self._lock = threading.RLock()
+
+    def _put(self, client_id: Any, client_info: ClientInfo) -> Optional[ClientInfo]:
+        """
+        Store a client and index it by language. Caller must hold the lock.
+
+        Returns:
+            The ClientInfo previously stored for the client, if any
+        """
+        previous = self._clients.get(client_id)
+        if previous is not None:
+            self._unindex(client_id, previous.lang)
+        self._clients[client_id] = client_info
+        self._by_lang.setdefault(client_info.lang, {})[client_id] = None
+        return previous
+
+    def _pop(self, client_id: Any) -> Optional[ClientInfo]:
+        """
+        Remove a client and its index entry. Caller must hold the lock.
+
+        Returns:
+            The removed ClientInfo, or None if the client was unknown
+        """
+        removed = self._clients.pop(client_id, None)
+        if removed is not None:
+            self._unindex(client_id, removed.lang)
+        return removed
+
+    def _set_lang(self, client_id: Any, client_info: ClientInfo, language: str) -> None:
+        """Change a stored client's language and reindex it. Caller holds the lock."""
+        if client_info.lang == language:
+            return
+        self._unindex(client_id, client_info.lang)
+        client_info.lang = language
+        self._by_lang.setdefault(language, {})[client_id] = None
+
+    def _unindex(self, client_id: Any, language: str) -> None:
+        """Drop a client from a language bucket, removing empty buckets."""
+        bucket = self._by_lang.get(language)
+        if bucket is not None:
+            bucket.pop(client_id, None)
+            if not bucket:
+                del self._by_lang[language]
 
     def add_client(self, client_id: Any, language: str = "en", ws: Any = None) -> None:
         """
@@ -31,21 +125,36 @@ class TranslationClientMap:
             language: Preferred language code (default: "en")
             ws: WebSocket connection object
         """
-        self._clients[client_id] = {"lang": language, "ws": ws}
-        logger.info(f"Client added: {client_id} (language: {language})")
+        with self._lock:
+            self._put(client_id, ClientInfo(language, ws))
+        logger.info("Client added: %s (language: %s)", client_id, language)
 
-    def delete_client(self, client_id: Any) -> None:
+    def delete_client(self, client_id: Any, force: bool = False) -> None:
         """
         Remove a client from the map.
 
         Args:
             client_id: Unique identifier for the client
+            force: Delete from backing storage even if the client is unknown
+                locally (no effect for the in-memory map)
         """
-        if client_id in self._clients:
-            del self._clients[client_id]
-            logger.info(f"Client deleted: {client_id}")
+        with self._lock:
+            removed = self._pop(client_id)
+        if removed is not None:
+            logger.info("Client deleted: %s", client_id)
 
-    def get_client(self, client_id: Any) -> Optional[Dict[str, Any]]:
+    def delete_clients_bulk(self, client_ids: List[Any]) -> None:
+        """
+        Remove several clients from the map.
+
+        Args:
+            client_ids: Unique identifiers of the clients to remove
+        """
+        with self._lock:
+            for client_id in client_ids:
+                self.delete_client(client_id)
+
+    def get_client(self, client_id: Any) -> Optional[ClientInfo]:
         """
         Get client information.
 
@@ -53,18 +162,64 @@ class TranslationClientMap:
             client_id: Unique identifier for the client
 
         Returns:
-            Dictionary with client info (language, ws) or None if not found
+            ClientInfo for the client or None if not found
         """
         return self._clients.get(client_id)
 
-    def get_all_clients(self) -> Dict[Any, Dict[str, Any]]:
+    def get_all_clients(self) -> Dict[Any, ClientInfo]:
         """
         Get all clients.
 
         Returns:
             Dictionary of all clients with their information
         """
-        return self._clients.copy()
+        with self._lock:
+            return self._clients.copy()
+
+    def get_clients_bulk(self, client_ids: List[Any]) -> Dict[Any, ClientInfo]:
+        """
+        Get information for several clients at once.
+
+        Args:
+            client_ids: Client identifiers to look up
+
+        Returns:
+            Dictionary of client_id to client info for the clients found
+        """
+        found = {}
+        for client_id in client_ids:
+            client_info = self._clients.get(client_id)
+            if client_info is not None:
+                found[client_id] = client_info
+        return found
+
+    def snapshot(self) -> List[Tuple[Any, ClientInfo]]:
+        """
+        Get a point-in-time list of (client_id, client_info) pairs.
+
+        The copy is taken under the map lock, so concurrent adds and deletes
+        can neither corrupt it nor raise during iteration.
+
+        Returns:
+            List of (client_id, client_info) tuples
+        """
+        with self._lock:
+            return list(self._clients.items())
+
+    def get_clients_by_language(self) -> Dict[str, Tuple[Any, ...]]:
+        """
+        Get the client IDs for each language in use.
+
+        Served from the language index: cost is proportional to the number
+        of active languages and their client lists, without touching each
+        client's info. Each bucket is copied to a tuple under the lock, so
+        callers can iterate while clients come and go.
+
+        Returns:
+            Dictionary of language code to tuple of client IDs
+        """
+        with self._lock:
+            return {lang: tuple(bucket) for lang, bucket in self._by_lang.items()}
 
     def update_language(self, client_id: Any, language: str) -> bool:
         """
@@ -77,11 +232,13 @@ class TranslationClientMap:
         Returns:
             True if update was successful, False if client not found
         """
-        if client_id in self._clients:
-            self._clients[client_id]["lang"] = language
-            logger.info(f"Client {client_id} language updated to: {language}")
-            return True
-        return False
+        with self._lock:
+            client_info = self._clients.get(client_id)
+            if client_info is None:
+                return False
+            self._set_lang(client_id, client_info, language)
+        logger.info("Client %s language updated to: %s", client_id, language)
+        return True
 
     def count(self) -> int:
         """
@@ -104,138 +261,569 @@ class TranslationClientMap:
         """
         return client_id in self._clients
 
+    def flush(self) -> None:
+        """
+        Persist any buffered writes.
+        The in-memory map writes through immediately, so there is nothing to do.
+        """
+
+    def refresh(self, max_age: float = 0.0) -> int:
+        """
+        Resync the map with its backing storage.
+        The in-memory map is its own storage, so there is nothing to do.
+
+        Args:
+            max_age: Skip the resync if the last one is younger than this
+
+        Returns:
+            Number of clients
+        """
+        return self.count()
+
+
+def _check_client_id(client_id: Any) -> None:
+    """
+    Reject client IDs that can't be used as-is as the DynamoDB string key.
+
+    Checked before anything is cached or buffered, so a bad ID fails its own
+    call instead of the whole BatchWriteItem it would later be flushed in.
+
+    Raises:
+        TypeError: If client_id is not a string
+    """
+    if not isinstance(client_id, str):
+        raise TypeError(f"client_id must be a str, got {type(client_id).__name__}")
+
 
 class TranslationClientMapDynamoDB(TranslationClientMap):
     """
     DynamoDB-backed client map for distributed deployments.
     Stores client mappings in a DynamoDB table.
+
+    Puts, language updates and deletes are buffered and written in
+    BatchWriteItem calls of up to 25 requests. The local cache is updated
+    synchronously, so reads on this instance always see the latest state.
+    Call flush() when a write must be durable before continuing.
+
+    Long-running servers can enable a background flusher, which writes the
+    buffer every flush_interval and backs off exponentially while DynamoDB
+    rejects writes; the buffer is then also drained at interpreter exit.
+    Leave it off in AWS Lambda, where frozen containers never reliably run
+    background threads or exit hooks, and flush() before each handler returns.
     """
 
-    def __init__(self, table_name: str, region_name: str = "us-east-1"):
+    def __init__(
+        self,
+        table_name: str,
+        region_name: str = "us-east-1",
+        flush_interval: float = 0.1,
+        background_flush: bool = False,
+    ):
         """
         Initialize the DynamoDB client map.
 
         Args:
             table_name: Name of the DynamoDB table
             region_name: AWS region for DynamoDB (default: "us-east-1")
+            flush_interval: Seconds between background flushes of buffered writes
+            background_flush: Write buffered changes from a background thread
+                instead of only on explicit flush() calls
         """
         super().__init__()  # Keep local cache for WebSocket objects
         self.table_name = table_name
         self.region_name = region_name
+        self.flush_interval = flush_interval
+        self.background_flush = background_flush
+
+        self._write_buffer: deque = deque()
+        self._flush_lock = threading.Lock()
+        self._flush_wakeup = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+        if background_flush:
+            atexit.register(self._drain)
+
+        # Clients written through this instance since the last refresh(),
+        # whose cached state is newer than anything a scan may return
+        self._written: set = set()
+        self._refreshed_at: Optional[float] = None
 
         try:
-            self.dynamodb = boto3.resource("dynamodb", region_name=region_name)
+            self.dynamodb = boto3.resource(
+                "dynamodb", region_name=region_name, config=DYNAMODB_CLIENT_CONFIG
+            )
             self.table = self.dynamodb.Table(table_name)
-            logger.info(f"DynamoDB client map initialized (table: {table_name})")
+            logger.info("DynamoDB client map initialized (table: %s)", table_name)
         except Exception as e:
-            logger.error(f"Failed to initialize DynamoDB client map: {e}")
+            logger.error("Failed to initialize DynamoDB client map: %s", e)
             raise
 
-    def add_client(self, client_id: Any, language: str = "en", ws: Any = None) -> None:
+    def add_client(self, client_id: str, language: str = "en", ws: Any = None) -> None:
         """
-        Add or update a client in DynamoDB and local cache.
+        Add or update a client in the local cache and queue the DynamoDB write.
+
+        Re-adding a cached client with an unchanged language only refreshes
+        the WebSocket reference; the stored item would be identical, so no
+        write capacity is spent on it.
 
         Args:
-            client_id: Unique identifier for the client
+            client_id: Unique identifier for the client, used as-is as the
+                DynamoDB key (API Gateway connection IDs are always strings)
             language: Preferred language code (default: "en")
             ws: WebSocket connection object (stored only in local cache)
+
+        Raises:
+            TypeError: If client_id is not a string
         """
-        # Store in DynamoDB
+        _check_client_id(client_id)
+
+        with self._lock:
+            # Keep in local cache for WebSocket reference
+            cached = self._put(client_id, ClientInfo(language, ws))
+
+        if cached is not None and cached.lang == language:
+            return
+
+        self._enqueue_write(
+            {"PutRequest": {"Item": {"client_id": client_id, "lang": language}}}
+        )
+        logger.info("Client added to DynamoDB: %s (language: %s)", client_id, language)
+
+    def delete_client(self, client_id: str, force: bool = False) -> None:
+        """
+        Remove a client from the local cache and queue the DynamoDB delete.
+
+        Clients unknown to this instance are skipped to save a DynamoDB
+        request, e.g. when stale connections are cleaned up during a
+        broadcast. Pass force=True when the record may only exist in
+        DynamoDB, such as a $disconnect handled by a different container
+        than the one that handled $connect.
+
+        Args:
+            client_id: Unique identifier for the client
+            force: Queue the DynamoDB delete even if the client is not cached
+        Raises:
+            TypeError: If client_id is not a string
+        """
+        _check_client_id(client_id)
+
+        with self._lock:
+            removed = self._pop(client_id)
+        if removed is None and not force:
+            return
+
+        self._enqueue_write({"DeleteRequest": {"Key": {"client_id": client_id}}})
+        logger.info("Client deleted from DynamoDB: %s", client_id)
+
+    def delete_clients_bulk(self, client_ids: List[str]) -> None:
+        """
+        Remove several cached clients and write the deletes to DynamoDB in
+        BatchWriteItem calls of up to 25 requests.
+
+        Like delete_client, clients unknown to this instance are skipped.
+        Deletes that cannot be written are kept in the buffer for the next
+        flush.
+
+        Args:
+            client_ids: Unique identifiers of the clients to remove
+
+        Raises:
+            TypeError: If any client_id is not a string; nothing is deleted
+        """
+        for client_id in client_ids:
+            _check_client_id(client_id)
+
+        deleted = 0
+        with self._lock:
+            for client_id in client_ids:
+                if self._pop(client_id) is None:
+                    continue
+                self._write_buffer.append(
+                    {"DeleteRequest": {"Key": {"client_id": client_id}}}
+                )
+                self._written.add(client_id)
+                deleted += 1
+
+        if not deleted:
+            return
+
         try:
-            self.table.put_item(
-                Item={
-                    "client_id": str(client_id),
-                    "lang": language,
-                }
-            )
+            self.flush()
         except ClientError as e:
-            logger.error(f"DynamoDB error adding client {client_id}: {e}")
-            raise
+            logger.error("DynamoDB error deleting %s clients: %s", deleted, e)
+            return
 
-        # Also keep in local cache for WebSocket reference
-        self._clients[client_id] = {"lang": language, "ws": ws}
-        logger.info(f"Client added to DynamoDB: {client_id} (language: {language})")
+        logger.info("Deleted %s clients from DynamoDB", deleted)
 
-    def delete_client(self, client_id: Any) -> None:
+    def flush(self) -> None:
         """
-        Remove a client from DynamoDB and local cache.
+        Write all buffered puts and deletes to DynamoDB.
+
+        Blocks until the buffer is drained, including any flush already in
+        progress on the background thread.
+
+        Raises:
+            ClientError: If a BatchWriteItem call fails or DynamoDB still
+                leaves items unprocessed after retrying. The unwritten
+                requests are put back at the front of the buffer for the
+                next flush.
+        """
+        with self._flush_lock:
+            while self._write_buffer:
+                batch = self._next_batch()
+                try:
+                    unprocessed = self._batch_write(batch)
+                except ClientError:
+                    self._write_buffer.extendleft(reversed(batch))
+                    raise
+                if unprocessed:
+                    self._write_buffer.extendleft(reversed(unprocessed))
+                    raise ClientError(
+                        {
+                            "Error": {
+                                "Code": "UnprocessedItems",
+                                "Message": f"{len(unprocessed)} client writes "
+                                f"unprocessed after {BATCH_MAX_RETRIES} retries",
+                            }
+                        },
+                        "BatchWriteItem",
+                    )
+
+    def _enqueue_write(self, request: Dict[str, Any]) -> None:
+        """
+        Buffer a BatchWriteItem request and, with background_flush enabled,
+        make sure the flusher is running.
 
         Args:
-            client_id: Unique identifier for the client
+            request: A PutRequest or DeleteRequest entry
         """
-        # Remove from DynamoDB
+        self._write_buffer.append(request)
+        self._written.add(self._request_key(request))
+        if not self.background_flush:
+            return
+
+        with self._lock:
+            if self._flusher is None:
+                self._flusher = threading.Thread(
+                    target=self._flush_loop, name="dynamodb-flusher", daemon=True
+                )
+                self._flusher.start()
+
+        if len(self._write_buffer) >= BATCH_WRITE_LIMIT:
+            self._flush_wakeup.set()
+
+    def _flush_loop(self) -> None:
+        """
+        Background loop flushing the write buffer every flush_interval.
+
+        After a failed flush the loop sleeps for an exponentially growing
+        delay (capped at FLUSH_BACKOFF_MAX) instead of waking early, so a
+        throttled table is not hammered with retries.
+        """
+        failures = 0
+        while True:
+            if failures:
+                time.sleep(min(self.flush_interval * (2**failures), FLUSH_BACKOFF_MAX))
+            else:
+                self._flush_wakeup.wait(self.flush_interval)
+            self._flush_wakeup.clear()
+            try:
+                self.flush()
+                failures = 0
+            except ClientError as e:
+                failures += 1
+                logger.error(
+                    "DynamoDB error flushing client writes (attempt %s): %s",
+                    failures,
+                    e,
+                )
+
+    def _drain(self) -> None:
+        """Flush remaining buffered writes at interpreter exit."""
+        if not self._write_buffer:
+            return
         try:
-            self.table.delete_item(Key={"client_id": str(client_id)})
+            self.flush()
         except ClientError as e:
-            logger.error(f"DynamoDB error deleting client {client_id}: {e}")
+            logger.error(
+                "DynamoDB error draining %s buffered client writes: %s",
+                len(self._write_buffer),
+                e,
+            )
 
-        # Also remove from local cache
-        if client_id in self._clients:
-            del self._clients[client_id]
-        logger.info(f"Client deleted from DynamoDB: {client_id}")
+    def _next_batch(self) -> List[Dict[str, Any]]:
+        """
+        Pop up to BATCH_WRITE_LIMIT requests from the buffer.
+
+        BatchWriteItem rejects duplicate keys within one call, so later
+        requests for the same client replace earlier ones.
 
-    def get_client(self, client_id: Any) -> Optional[Dict[str, Any]]:
+        Returns:
+            List of requests for a single BatchWriteItem call
         """
-        Get client information from local cache first, then DynamoDB.
+        batch: Dict[str, Dict[str, Any]] = {}
+        while self._write_buffer and len(batch) < BATCH_WRITE_LIMIT:
+            request = self._write_buffer.popleft()
+            key = self._request_key(request)
+            batch.pop(key, None)
+            batch[key] = request
+        return list(batch.values())
+
+    @staticmethod
+    def _request_key(request: Dict[str, Any]) -> str:
+        """Get the client_id a PutRequest or DeleteRequest entry writes."""
+        if "PutRequest" in request:
+            return request["PutRequest"]["Item"]["client_id"]
+        return request["DeleteRequest"]["Key"]["client_id"]
+
+    def _batch_write(self, requests: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Send one BatchWriteItem call, retrying UnprocessedItems with
+        exponential backoff.
+
+        Args:
+            requests: Up to BATCH_WRITE_LIMIT PutRequest/DeleteRequest entries
+
+        Returns:
+            Requests DynamoDB still left unprocessed after BATCH_MAX_RETRIES
+            retries (empty when everything was written)
+        """
+        request_items = {self.table_name: requests}
+        for attempt in range(BATCH_MAX_RETRIES + 1):
+            response = self.dynamodb.meta.client.batch_write_item(
+                RequestItems=request_items
+            )
+            request_items = response.get("UnprocessedItems") or {}
+            if not request_items:
+                return []
+            if attempt < BATCH_MAX_RETRIES:
+                time.sleep(BATCH_BACKOFF_BASE * (2**attempt))
+
+        unprocessed = request_items.get(self.table_name, [])
+        logger.error(
+            "DynamoDB left %s client writes unprocessed after %s retries",
+            len(unprocessed),
+            BATCH_MAX_RETRIES,
+        )
+        return unprocessed
+
+    def get_client(self, client_id: str) -> Optional[ClientInfo]:
+        """
+        Get client information from the local cache.
+
+        The cache only reflects changes made through this instance plus the
+        last refresh(). With several instances (e.g. Lambda containers) a
+        client connected through another one is a cache miss and returns
+        None, without querying DynamoDB. Callers that must see such clients
+        use get_clients_bulk() or refresh() first; update_language() does
+        not need the client cached.
 
         Args:
             client_id: Unique identifier for the client
 
         Returns:
-            Dictionary with client info or None if not found
+            ClientInfo for the client or None if not found
         """
-        # Check local cache first (has WebSocket reference)
-        if client_id in self._clients:
-            return self._clients[client_id]
+        return self._clients.get(client_id)
 
-        # Fallback to DynamoDB
-        try:
-            response = self.table.get_item(Key={"client_id": str(client_id)})
-            if "Item" in response:
-                return {
-                    "lang": response["Item"].get("lang", "en"),
-                    "ws": None,
-                }
-        except ClientError as e:
-            logger.error(f"DynamoDB error getting client {client_id}: {e}")
+    def get_clients_bulk(self, client_ids: List[str]) -> Dict[str, ClientInfo]:
+        """
+        Get information for several clients, resolving local cache misses
+        from DynamoDB with BatchGetItem calls of up to 100 keys.
 
-        return None
+        Clients found in DynamoDB are added to the local cache (without a
+        WebSocket reference) so later lookups stay local.
 
-    def update_language(self, client_id: Any, language: str) -> bool:
+        Args:
+            client_ids: Client identifiers to look up
+
+        Returns:
+            Dictionary of client_id to client info for the clients found
+
+        Raises:
+            TypeError: If any client_id is not a string
         """
-        Update the language preference in DynamoDB and local cache.
+        for client_id in client_ids:
+            _check_client_id(client_id)
+
+        found = super().get_clients_bulk(client_ids)
+        missing = [
+            client_id
+            for client_id in dict.fromkeys(client_ids)
+            if client_id not in found
+        ]
+
+        for start in range(0, len(missing), BATCH_GET_LIMIT):
+            chunk = missing[start : start + BATCH_GET_LIMIT]
+            try:
+                items = self._batch_get(chunk)
+            except ClientError as e:
+                logger.error("DynamoDB error getting %s clients: %s", len(chunk), e)
+                continue
+
+            with self._lock:
+                for item in items:
+                    client_info = self._clients.get(item["client_id"])
+                    if client_info is None:
+                        client_info = ClientInfo(item.get("lang", "en"))
+                        self._put(item["client_id"], client_info)
+                    found[item["client_id"]] = client_info
+
+        return found
+
+    def _batch_get(self, client_ids: List[str]) -> List[Dict[str, Any]]:
+        """
+        Send one BatchGetItem call, retrying UnprocessedKeys with
+        exponential backoff.
 
         Args:
-            client_id: Unique identifier for the client
-            language: New language code
+            client_ids: Up to BATCH_GET_LIMIT client identifiers
 
         Returns:
-            True if update was successful, False otherwise
+            List of items returned by DynamoDB
         """
-        # Update in DynamoDB
-        try:
-            self.table.update_item(
-                Key={"client_id": str(client_id)},
-                UpdateExpression="SET lang = :lang",
-                ExpressionAttributeValues={":lang": language},
+        items: List[Dict[str, Any]] = []
+        request_items = {
+            self.table_name: {
+                "Keys": [{"client_id": client_id} for client_id in client_ids],
+                "ProjectionExpression": "client_id, lang",
+            }
+        }
+        for attempt in range(BATCH_MAX_RETRIES + 1):
+            response = self.dynamodb.meta.client.batch_get_item(
+                RequestItems=request_items
             )
+            items.extend(response.get("Responses", {}).get(self.table_name, []))
+            request_items = response.get("UnprocessedKeys") or {}
+            if not request_items:
+                return items
+            if attempt < BATCH_MAX_RETRIES:
+                time.sleep(BATCH_BACKOFF_BASE * (2**attempt))
+
+        unprocessed = len(request_items.get(self.table_name, {}).get("Keys", []))
+        logger.error(
+            "DynamoDB left %s client lookups unprocessed after %s retries",
+            unprocessed,
+            BATCH_MAX_RETRIES,
+        )
+        return items
+
+    def refresh(self, max_age: float = 0.0) -> int:
+        """
+        Resync the local cache with the clients currently stored in DynamoDB.
+
+        Other instances add, remove and re-language connections without
+        notifying this one, so broadcasts call this before enumerating
+        recipients. The full-table Scan is only repeated once the last
+        refresh is older than max_age. Buffered writes are flushed first and
+        the Scan is strongly consistent. Clients this instance wrote since
+        the last refresh keep their cached state, so a stale Scan can't
+        drop, resurrect or re-language them. Cached clients keep their
+        WebSocket reference. On a DynamoDB error the cache is left unchanged.
+
+        Args:
+            max_age: Seconds a previous refresh stays fresh (0 always scans)
+
+        Returns:
+            Number of clients in the local cache
+        """
+        started = time.monotonic()
+        if self._refreshed_at is not None and started - self._refreshed_at < max_age:
+            return self.count()
+
+        with self._lock:
+            written, self._written = self._written, set()
+
+        stored: Dict[str, str] = {}
+        try:
+            self.flush()
+            for items in self._scan_pages():
+                for item in items:
+                    stored[item["client_id"]] = item.get("lang", "en")
         except ClientError as e:
-            logger.error(f"DynamoDB error updating client {client_id}: {e}")
-            return False
+            logger.error("DynamoDB error refreshing client cache: %s", e)
+            with self._lock:
+                self._written |= written
+            return self.count()
+
+        with self._lock:
+            # Includes clients written while the scan was running
+            keep = written | self._written
+            for client_id in [
+                c for c in self._clients if c not in stored and c not in keep
+            ]:
+                self._pop(client_id)
+            for client_id, language in stored.items():
+                if client_id in keep:
+                    continue
+                client_info = self._clients.get(client_id)
+                if client_info is None:
+                    self._put(client_id, ClientInfo(language))
+                else:
+                    self._set_lang(client_id, client_info, language)
+
+        self._refreshed_at = started
+        logger.info("Refreshed %s clients from DynamoDB", len(stored))
+        return self.count()
+
+    def _scan_pages(self):
+        """
+        Scan the whole table, yielding the items of each page.
 
-        # Also update local cache if present
-        if client_id in self._clients:
-            self._clients[client_id]["lang"] = language
+        Yields:
+            List of items (client_id and lang only) per Scan page
+        """
+        scan_kwargs: Dict[str, Any] = {
+            "ProjectionExpression": "client_id, lang",
+            "ConsistentRead": True,
+        }
+        while True:
+            response = self.table.scan(**scan_kwargs)
+            yield response.get("Items", [])
+
+            if "LastEvaluatedKey" not in response:
+                return
+            scan_kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+    def update_language(self, client_id: str, language: str) -> bool:
+        """
+        Update the language preference in the local cache and queue the
+        DynamoDB write.
+
+        The write is a full-item put (client_id and lang are the only stored
+        attributes), so it coalesces with other buffered writes for the same
+        client. Write failures surface from flush(), not from this call.
 
-        logger.info(f"Client {client_id} language updated in DynamoDB to: {language}")
+        Args:
+            client_id: Unique identifier for the client
+            language: New language code
+
+        Returns:
+            True; the update is always accepted
+        Raises:
+            TypeError: If client_id is not a string
+        """
+        _check_client_id(client_id)
+
+        with self._lock:
+            client_info = self._clients.get(client_id)
+            if client_info is not None:
+                self._set_lang(client_id, client_info, language)
+
+        self._enqueue_write(
+            {"PutRequest": {"Item": {"client_id": client_id, "lang": language}}}
+        )
+        logger.info(
+            "Client %s language update queued for DynamoDB: %s", client_id, language
+        )
         return True
 
     def count(self) -> int:
         """
         Get the number of clients from local cache.
-        Note: For distributed systems, this only counts locally connected clients.
+        Note: For distributed systems, this only counts clients connected to this
+        instance plus any loaded by refresh().
 
         Returns:
-            Number of locally connected clients
+            Number of clients in the local cache
         """
         return len(self._clients)
@@ -77,6 +77,68 @@ func TestInt16ToFloat32(t *testing.T) {
 	}
 }
 
+func TestInt16ToBytes(t *testing.T) {
+	tests := []struct {
+		name     string
+		input    []int16
+		expected []byte
+	}{
+		{"zero", []int16{0}, []byte{0x00, 0x00}},
+		{"max positive", []int16{32767}, []byte{0xff, 0x7f}},
+		{"max negative", []int16{-32768}, []byte{0x00, 0x80}},
+		{"mixed", []int16{1, -1, 256}, []byte{0x01, 0x00, 0xff, 0xff, 0x00, 0x01}},
+		{"empty", []int16{}, []byte{}},
+	}
+
+	for _, tt := range tests {
+		t.Run(tt.name, func(t *testing.T) {
+			result := int16ToBytes(tt.input)
+			if len(result) != len(tt.expected) {
+				t.Fatalf("len = %d, want %d", len(result), len(tt.expected))
+			}
+			for i := range result {
+				if result[i] != tt.expected[i] {
+					t.Errorf("[%d] = %#x, want %#x", i, result[i], tt.expected[i])
+				}
+			}
+		})
+	}
+}
+
+func TestIsSilentWindow(t *testing.T) {
+	loud := make([]int16, 1600)
+	for i := range loud {
+		if i%2 == 0 {
+			loud[i] = 2000
+		} else {
+			loud[i] = -2000
+		}
+	}
+	quiet := make([]int16, 1600)
+	for i := range quiet {
+		quiet[i] = int16(i%5) - 2
+	}
+
+	tests := []struct {
+		name    string
+		samples []int16
+		want    bool
+	}{
+		{"empty", []int16{}, true},
+		{"zeros", make([]int16, 1600), true},
+		{"low noise", quiet, true},
+		{"speech level", loud, false},
+	}
+
+	for _, tt := range tests {
+		t.Run(tt.name, func(t *testing.T) {
+			if got := isSilentWindow(tt.samples); got != tt.want {
+				t.Errorf("isSilentWindow() = %v, want %v", got, tt.want)
+			}
+		})
+	}
+}
+
 // ---------------------------------------------------------------------------
 // isWhisperNoiseToken tests
 // ---------------------------------------------------------------------------
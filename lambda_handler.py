@@ -7,13 +7,23 @@ Handles WebSocket lifecycle and message routing for Live Translation.
 import json
 import logging
 import os
-from typing import Dict, Any, Optional
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Dict, Any, Optional, Union
 import boto3
+from botocore.config import Config
 from botocore.exceptions import ClientError
 
 # Import our existing modules
-from client_map import TranslationClientMapDynamoDB
-from message_handler import MessageHandler, TranslationService
+from client_map import TranslationClientMap, TranslationClientMapDynamoDB
+from message_handler import (
+    MessageHandler,
+    TranslationService,
+    decode_message,
+    encode_message,
+    intern_message_type,
+)
 from token_generator import TokenGenerator
 
 # Configure logging
@@ -27,30 +37,108 @@ DYNAMODB_TABLE_NAME = os.environ.get(
 AWS_REGION = os.environ.get("AWS_REGION", "us-east-1")
 API_KEY = os.environ.get("API_KEY")
 
-# Initialize services
-translation_service = TranslationService(region_name=AWS_REGION)
+# How long a container reuses its view of the connections table before a
+# broadcast rescans it. Connections made through other containers may miss
+# broadcasts for up to this long; a shorter interval costs more Scans.
+CLIENT_REFRESH_SECONDS = float(os.environ.get("CLIENT_REFRESH_SECONDS", "10"))
+
+# Shared read-only default for messages without a "data" field
+_EMPTY = MappingProxyType({})
 
-# Initialize token generator for AWS Transcribe credentials
-token_generator = TokenGenerator(region_name=AWS_REGION)
+# API Gateway Management API client settings. The pool must be at least as
+# large as the broadcast fan-out or sends stall waiting for a connection.
+APIGW_CLIENT_CONFIG = Config(
+    max_pool_connections=64,
+    tcp_keepalive=True,
+    retries={"max_attempts": 5, "mode": "adaptive"},
+)
 
-# Initialize message handler with token generator
-message_handler = MessageHandler(translation_service, API_KEY, token_generator)
+# Worker pool for concurrent post_to_connection calls. Must not exceed the
+# client's max_pool_connections, otherwise workers queue on the HTTP pool.
+BROADCAST_MAX_WORKERS = 32
+_executor = ThreadPoolExecutor(max_workers=BROADCAST_MAX_WORKERS)
+
+
+# Services are built on first use so each route only pays for what it needs:
+# $connect/$disconnect never create the Translate or STS clients.
+@lru_cache(maxsize=1)
+def _translation_service() -> TranslationService:
+    """Get the shared TranslationService, creating it on first use."""
+    return TranslationService(region_name=AWS_REGION)
+
+
+@lru_cache(maxsize=1)
+def _message_handler() -> MessageHandler:
+    """Get the shared MessageHandler, creating it on first use."""
+    # Token generator provides AWS Transcribe credentials to speech clients
+    token_generator = TokenGenerator(region_name=AWS_REGION)
+    return MessageHandler(_translation_service(), API_KEY, token_generator)
+
+
+# The client map is not warmed up front: $connect/$disconnect need no other
+# clients, and a cache loaded once goes stale as other containers add and
+# remove connections. Broadcasts refresh() it from DynamoDB instead, at most
+# once per CLIENT_REFRESH_SECONDS.
+@lru_cache(maxsize=1)
+def _client_map() -> TranslationClientMap:
+    """Get the shared client map, creating it on first use."""
+    try:
+        return TranslationClientMapDynamoDB(
+            table_name=DYNAMODB_TABLE_NAME, region_name=AWS_REGION
+        )
+    except Exception as e:
+        logger.error("Failed to initialize DynamoDB client map: %s", e)
+        # Fall back to in-memory map for local testing
+        return TranslationClientMap()
 
-# Initialize client map with DynamoDB
-try:
-    client_map = TranslationClientMapDynamoDB(
-        table_name=DYNAMODB_TABLE_NAME, region_name=AWS_REGION
-    )
-except Exception as e:
-    logger.error(f"Failed to initialize DynamoDB client map: {e}")
-    # Fall back to in-memory map for local testing
-    from client_map import TranslationClientMap
 
-    client_map = TranslationClientMap()
+def _flush_client_map() -> None:
+    """
+    Write any buffered client map changes before the handler returns.
+
+    The DynamoDB map has no background flusher here: a frozen container never
+    runs it, so writes still buffered at the end of an invocation could be
+    lost. Routes that never built the map skip the flush entirely.
+    """
+    if not _client_map.cache_info().currsize:
+        return
+    try:
+        _client_map().flush()
+    except ClientError as e:
+        logger.error("DynamoDB error flushing client map: %s", e)
+
 
 # API Gateway Management API clients keyed by endpoint (one client per domain/stage)
 apigw_management_clients = {}
 
+# Endpoint known at deploy time (https://{domain}). When set, its client is
+# created during container init so the first message skips the TLS handshake.
+APIGW_ENDPOINT = os.environ.get("APIGW_ENDPOINT")
+
+
+def create_apigw_management_client(endpoint_url: str):
+    """
+    Create an API Gateway Management API client and cache it by endpoint.
+
+    Args:
+        endpoint_url: Management API endpoint (e.g. https://{domain})
+
+    Returns:
+        boto3 API Gateway Management API client
+    """
+    client = boto3.client(
+        "apigatewaymanagementapi",
+        endpoint_url=endpoint_url,
+        region_name=AWS_REGION,
+        config=APIGW_CLIENT_CONFIG,
+    )
+    apigw_management_clients[endpoint_url] = client
+    return client
+
+
+if APIGW_ENDPOINT:
+    create_apigw_management_client(APIGW_ENDPOINT)
+
 
 def get_apigw_management_client(event: Dict[str, Any]):
     """
@@ -70,7 +158,8 @@ def get_apigw_management_client(event: Dict[str, Any]):
     endpoint_url = f"https://{domain_name}" if domain_name else None
 
     logger.debug(
-        f"Creating/getting apigatewaymanagementapi client for endpoint: {endpoint_url}"
+        "Creating/getting apigatewaymanagementapi client for endpoint: %s",
+        endpoint_url,
     )
 
     if not endpoint_url:
@@ -82,45 +171,46 @@ def get_apigw_management_client(event: Dict[str, Any]):
     # don't reuse a client configured for a different endpoint.
     client = apigw_management_clients.get(endpoint_url)
     if client is None:
-        client = boto3.client(
-            "apigatewaymanagementapi",
-            endpoint_url=endpoint_url,
-            region_name=AWS_REGION,
-        )
-        apigw_management_clients[endpoint_url] = client
+        client = create_apigw_management_client(endpoint_url)
 
     return client
 
 
 def send_message_to_connection(
-    connection_id: str, message: Dict[str, Any], apigw_client
+    connection_id: str, message: Union[Dict[str, Any], bytes], apigw_client
 ) -> bool:
     """
     Send a message to a specific WebSocket connection.
 
+    Gone connections are not removed here: broadcast callers collect the
+    failures and delete them in one bulk call, and a gone requester is
+    cleaned up by its own $disconnect.
+
     Args:
         connection_id: WebSocket connection ID
-        message: Message dictionary to send
+        message: Message dictionary to send, or an already encoded JSON payload
         apigw_client: API Gateway Management API client
 
     Returns:
         True if successful, False otherwise
     """
+    if isinstance(message, bytes):
+        payload = message
+    else:
+        payload = encode_message(message)
+
     try:
-        apigw_client.post_to_connection(
-            ConnectionId=connection_id, Data=json.dumps(message).encode("utf-8")
-        )
+        apigw_client.post_to_connection(ConnectionId=connection_id, Data=payload)
         return True
     except ClientError as e:
         error_code = e.response.get("Error", {}).get("Code")
         if error_code == "GoneException":
-            logger.info(f"Connection {connection_id} is gone, removing from map")
-            client_map.delete_client(connection_id)
+            logger.info("Connection %s is gone", connection_id)
         else:
-            logger.error(f"Error sending to connection {connection_id}: {e}")
+            logger.error("Error sending to connection %s: %s", connection_id, e)
         return False
     except Exception as e:
-        logger.error(f"Unexpected error sending to connection {connection_id}: {e}")
+        logger.error("Unexpected error sending to connection %s: %s", connection_id, e)
         return False
 
 
@@ -135,18 +225,27 @@ def broadcast_message(
         apigw_client: API Gateway Management API client
         exclude_connection: Optional connection ID to exclude from broadcast
     """
-    failed_connections = []
+    client_map = _client_map()
+    client_map.refresh(CLIENT_REFRESH_SECONDS)
+
+    # Encode once; every recipient gets the same bytes
+    payload = encode_message(message)
 
-    for client_id, client_info in client_map.get_all_clients().items():
-        if client_id == exclude_connection:
-            continue
+    futures = {
+        _executor.submit(
+            send_message_to_connection, client_id, payload, apigw_client
+        ): client_id
+        for client_id, _ in client_map.snapshot()
+        if client_id != exclude_connection
+    }
 
-        if not send_message_to_connection(client_id, message, apigw_client):
-            failed_connections.append(client_id)
+    failed_connections = [
+        futures[future] for future in as_completed(futures) if not future.result()
+    ]
 
-    # Clean up failed connections
-    for client_id in failed_connections:
-        client_map.delete_client(client_id)
+    # Clean up failed connections with one bulk delete
+    if failed_connections:
+        client_map.delete_clients_bulk(failed_connections)
 
 
 def handle_connect(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
@@ -161,15 +260,21 @@ def handle_connect(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         API Gateway response
     """
     connection_id = event["requestContext"]["connectionId"]
+    client_map = _client_map()
 
     try:
         # Add client with default language
         client_map.add_client(connection_id, language="en", ws=None)
-        logger.info(f"Client connected: {connection_id}")
+        client_map.flush()
+        logger.info("Client connected: %s", connection_id)
 
         return {"statusCode": 200, "body": "Connected"}
     except Exception as e:
-        logger.error(f"Error handling connect: {e}")
+        logger.error("Error handling connect: %s", e)
+        # API Gateway drops the connection on a 500, so don't leave a cache
+        # entry or a buffered put behind for broadcasts to keep trying. The
+        # delete replaces the put in the buffer.
+        client_map.delete_client(connection_id, force=True)
         return {"statusCode": 500, "body": "Failed to connect"}
 
 
@@ -185,17 +290,111 @@ def handle_disconnect(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         API Gateway response
     """
     connection_id = event["requestContext"]["connectionId"]
+    client_map = _client_map()
 
     try:
-        client_map.delete_client(connection_id)
-        logger.info(f"Client disconnected: {connection_id}")
+        # The connection may have been added by another Lambda container
+        client_map.delete_client(connection_id, force=True)
+        client_map.flush()
+        logger.info("Client disconnected: %s", connection_id)
 
         return {"statusCode": 200, "body": "Disconnected"}
     except Exception as e:
-        logger.error(f"Error handling disconnect: {e}")
+        logger.error("Error handling disconnect: %s", e)
         return {"statusCode": 500, "body": "Failed to disconnect"}
 
 
+def _dispatch_set_language(
+    connection_id: str, msg_data: Dict[str, Any], apigw_client
+) -> Optional[Dict[str, Any]]:
+    """Handle a set_language message and send the connection status."""
+    message_handler = _message_handler()
+    client_map = _client_map()
+    language = msg_data.get("lang", "en")
+    response = message_handler.handle_set_language(connection_id, language, client_map)
+    client_map.flush()
+    send_message_to_connection(connection_id, response, apigw_client)
+
+    # Send connection status on first message
+    status_msg = message_handler.create_connection_status_message()
+    send_message_to_connection(connection_id, status_msg, apigw_client)
+    return None
+
+
+def _dispatch_generate_token(
+    connection_id: str, msg_data: Dict[str, Any], apigw_client
+) -> Optional[Dict[str, Any]]:
+    """Handle a token generation request from the speech-to-text client."""
+    provided_key = msg_data.get("api_key", "")
+    response = _message_handler().handle_generate_token(provided_key)
+    send_message_to_connection(connection_id, response, apigw_client)
+    return None
+
+
+def _dispatch_new_text(
+    connection_id: str, msg_data: Dict[str, Any], apigw_client
+) -> Optional[Dict[str, Any]]:
+    """Translate new text from the speech-to-text client and fan it out."""
+    message_handler = _message_handler()
+    original_text = msg_data.get("text", "")
+    timestamp = msg_data.get("timestamp", "")
+    provided_key = msg_data.get("api_key", "")
+
+    # Authorize once, before any DynamoDB or Translate work
+    if not message_handler.validate_api_key(provided_key):
+        logger.warning("Unauthorized new_text attempt from %s", connection_id)
+        error_msg = message_handler.create_error_message(
+            message_handler.ERROR_UNAUTHORIZED
+        )
+        send_message_to_connection(connection_id, error_msg, apigw_client)
+        return {"statusCode": 401, "body": "Unauthorized"}
+
+    client_map = _client_map()
+    client_map.refresh(CLIENT_REFRESH_SECONDS)
+    result = message_handler.handle_new_text(original_text, timestamp, client_map)
+
+    # Send translations to all clients concurrently, reusing one encoded
+    # message per language
+    futures = {
+        _executor.submit(
+            send_message_to_connection, client_id, payload, apigw_client
+        ): client_id
+        for payload, client_ids in result["payloads"].values()
+        for client_id in client_ids
+    }
+
+    failed_connections = [
+        futures[future] for future in as_completed(futures) if not future.result()
+    ]
+
+    # Clean up failed connections with one bulk delete
+    if failed_connections:
+        client_map.delete_clients_bulk(failed_connections)
+    return None
+
+
+def _dispatch_request_translation(
+    connection_id: str, msg_data: Dict[str, Any], apigw_client
+) -> Optional[Dict[str, Any]]:
+    """Handle an on-demand translation request."""
+    text = msg_data.get("text", "")
+    target_language = msg_data.get("target_language", "en")
+
+    response = _message_handler().handle_request_translation(text, target_language)
+    send_message_to_connection(connection_id, response, apigw_client)
+    return None
+
+
+# Message type -> handler. Each handler returns an API Gateway response to
+# short-circuit with, or None for the default 200.
+_HANDLERS = {
+    MessageHandler.MESSAGE_TYPE_SET_LANGUAGE: _dispatch_set_language,
+    MessageHandler.MESSAGE_TYPE_GENERATE_TOKEN: _dispatch_generate_token,
+    MessageHandler.MESSAGE_TYPE_NEW_TEXT: _dispatch_new_text,
+    MessageHandler.MESSAGE_TYPE_REQUEST_TRANSLATION: _dispatch_request_translation,
+}
+
+
 def handle_message(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     """
     Handle WebSocket messages ($default route).
@@ -213,82 +412,31 @@ def handle_message(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     try:
         # Parse message body
         body = event.get("body", "{}")
-        message = json.loads(body)
-        msg_type = message.get("type")
-        msg_data = message.get("data", {})
-
-        logger.info(f"Received message from {connection_id}: type={msg_type}")
-
-        if msg_type == message_handler.MESSAGE_TYPE_SET_LANGUAGE:
-            # Handle language preference
-            language = msg_data.get("lang", "en")
-            response = message_handler.handle_set_language(
-                connection_id, language, client_map
-            )
-            send_message_to_connection(connection_id, response, apigw_client)
-
-        elif msg_type == message_handler.MESSAGE_TYPE_GENERATE_TOKEN:
-            # Handle token generation request from speech-to-text client
-            provided_key = msg_data.get("api_key", "")
-            response = message_handler.handle_generate_token(provided_key)
-            send_message_to_connection(connection_id, response, apigw_client)
-
-        elif msg_type == message_handler.MESSAGE_TYPE_NEW_TEXT:
-            # Handle new text from speech-to-text application
-            original_text = msg_data.get("text", "")
-            timestamp = msg_data.get("timestamp", "")
-            provided_key = msg_data.get("api_key", "")
-
-            result = message_handler.handle_new_text(
-                original_text, timestamp, provided_key, client_map
-            )
+        message = decode_message(body)
+        msg_type = intern_message_type(message.get("type"))
+        msg_data = message.get("data", _EMPTY)
 
-            if result["status"] == "error":
-                logger.warning(f"Unauthorized new_text attempt from {connection_id}")
-                error_msg = message_handler.create_error_message(result["error"])
-                send_message_to_connection(connection_id, error_msg, apigw_client)
-                return {"statusCode": 401, "body": "Unauthorized"}
-
-            # Broadcast translations to all clients
-            for translation_info in result["translations"]:
-                target_client_id = translation_info["client_id"]
-                translation = translation_info["translation"]
-
-                message_to_send = {
-                    "type": message_handler.MESSAGE_TYPE_TRANSLATED_TEXT,
-                    "data": translation,
-                }
-                send_message_to_connection(
-                    target_client_id, message_to_send, apigw_client
-                )
-
-        elif msg_type == message_handler.MESSAGE_TYPE_REQUEST_TRANSLATION:
-            # Handle on-demand translation request
-            text = msg_data.get("text", "")
-            target_language = msg_data.get("target_language", "en")
-
-            response = message_handler.handle_request_translation(text, target_language)
-            send_message_to_connection(connection_id, response, apigw_client)
+        logger.info("Received message from %s: type=%s", connection_id, msg_type)
 
-        else:
-            logger.warning(f"Unknown message type from {connection_id}: {msg_type}")
-            error_msg = message_handler.create_error_message(
+        handler = _HANDLERS.get(msg_type)
+        if handler is None:
+            logger.warning("Unknown message type from %s: %s", connection_id, msg_type)
+            error_msg = _message_handler().create_error_message(
                 f"Unknown message type: {msg_type}"
             )
             send_message_to_connection(connection_id, error_msg, apigw_client)
-
-        # Send connection status on first message
-        if msg_type == message_handler.MESSAGE_TYPE_SET_LANGUAGE:
-            status_msg = message_handler.create_connection_status_message()
-            send_message_to_connection(connection_id, status_msg, apigw_client)
+        else:
+            response = handler(connection_id, msg_data, apigw_client)
+            if response is not None:
+                return response
 
         return {"statusCode": 200, "body": "Message processed"}
 
     except json.JSONDecodeError as e:
-        logger.error(f"Invalid JSON from connection {connection_id}: {e}")
+        logger.error("Invalid JSON from connection %s: %s", connection_id, e)
         return {"statusCode": 400, "body": "Invalid JSON"}
     except Exception as e:
-        logger.error(f"Error processing message from {connection_id}: {e}")
+        logger.error("Error processing message from %s: %s", connection_id, e)
         return {"statusCode": 500, "body": "Internal server error"}
 
 
@@ -306,14 +454,17 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     """
     route_key = event["requestContext"]["routeKey"]
 
-    logger.info(f"Processing route: {route_key}")
+    logger.info("Processing route: %s", route_key)
 
-    if route_key == "$connect":
-        return handle_connect(event, context)
-    elif route_key == "$disconnect":
-        return handle_disconnect(event, context)
-    elif route_key == "$default":
-        return handle_message(event, context)
-    else:
-        logger.warning(f"Unknown route: {route_key}")
-        return {"statusCode": 400, "body": f"Unknown route: {route_key}"}
+    try:
+        if route_key == "$connect":
+            return handle_connect(event, context)
+        elif route_key == "$disconnect":
+            return handle_disconnect(event, context)
+        elif route_key == "$default":
+            return handle_message(event, context)
+        else:
+            logger.warning("Unknown route: %s", route_key)
+            return {"statusCode": 400, "body": f"Unknown route: {route_key}"}
+    finally:
+        _flush_client_map()
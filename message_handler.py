@@ -4,33 +4,177 @@ Message handling logic for Live Translation.
 Contains reusable business logic that can be used with Flask or AWS API Gateway.
 """
 
+import hashlib
+import json
 import logging
+import os
 import secrets
-from typing import Dict, Any, Optional
+import sys
+from concurrent.futures import ThreadPoolExecutor, wait
+from functools import lru_cache
+from typing import Dict, Any, Optional, Union
 import boto3
+from botocore.config import Config
 from botocore.exceptions import ClientError, NoCredentialsError
 
+try:
+    import orjson
+except ImportError:  # Optional: fall back to the standard library json module
+    orjson = None
+
+try:
+    import redis
+except ImportError:  # Optional: only needed for the shared translation cache
+    redis = None
+
 logger = logging.getLogger(__name__)
 
+# Bounded so a burst of languages can't exceed the AWS Translate TPS quota.
+# boto3 clients are thread-safe and release the GIL while waiting on I/O.
+TRANSLATE_MAX_WORKERS = 16
+_translate_pool = ThreadPoolExecutor(
+    max_workers=TRANSLATE_MAX_WORKERS, thread_name_prefix="translate"
+)
+
+# Longest a broadcast waits for its translations. Languages still pending
+# are sent the original text so one slow call can't hold up the rest.
+TRANSLATE_RESULT_TIMEOUT = 5.0
+
+# Pool larger than the translate workers so concurrent calls reuse warm
+# keep-alive connections instead of opening new TLS sessions. Short timeouts
+# and few retries: a caption that arrives late is worth less than the
+# original text now.
+TRANSLATE_CLIENT_CONFIG = Config(
+    max_pool_connections=32,
+    tcp_keepalive=True,
+    connect_timeout=1.0,
+    read_timeout=3.0,
+    retries={"max_attempts": 2, "mode": "standard"},
+)
+
+# Shared (L2) translation cache. Translations don't go stale, so entries just
+# age out; a slow Redis is skipped rather than delaying captions.
+REDIS_CACHE_TTL = 14 * 24 * 3600
+REDIS_MAX_CONNECTIONS = 32
+REDIS_SOCKET_TIMEOUT = 0.25
+
+
+def encode_message(message: Dict[str, Any]) -> bytes:
+    """
+    Serialize a message to UTF-8 encoded JSON.
+
+    Uses orjson when available, which is several times faster than the
+    standard library and returns bytes without an intermediate str.
+
+    Args:
+        message: Message dictionary
+
+    Returns:
+        JSON payload as UTF-8 bytes
+    """
+    if orjson is not None:
+        return orjson.dumps(message)
+    return json.dumps(message, ensure_ascii=False).encode("utf-8")
+
+
+def decode_message(data: Union[str, bytes]) -> Any:
+    """
+    Parse a JSON message.
+
+    Args:
+        data: JSON text or UTF-8 bytes
+
+    Returns:
+        Decoded message
+
+    Raises:
+        json.JSONDecodeError: If data is not valid JSON (orjson's error type
+            is a subclass)
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def intern_message_type(msg_type: Any) -> Any:
+    """
+    Intern a decoded message type string.
+
+    The MESSAGE_TYPE_* constants are string literals, which CPython interns,
+    but strings produced by the JSON decoder are not. Interning the decoded
+    type lets dispatch-table lookups match the constant keys by identity
+    instead of comparing characters.
+
+    Args:
+        msg_type: The "type" field of a decoded message
+
+    Returns:
+        The interned string, or msg_type unchanged if it isn't a string
+    """
+    return sys.intern(msg_type) if type(msg_type) is str else msg_type
+
 
 class TranslationService:
     """
     Service for handling text translation using AWS Translate.
+
+    Successful translations are kept in an in-process LRU cache keyed by
+    (text, target language, source language), so repeated phrases are
+    answered without calling AWS. Failed translations are not cached.
+
+    When TRANSLATE_REDIS_URL is set, Redis is consulted on a local miss, so
+    translations survive restarts and are shared between server replicas.
     """
 
-    def __init__(self, region_name: str = "us-east-1"):
+    def __init__(
+        self,
+        region_name: str = "us-east-1",
+        cache_size: Optional[int] = None,
+        endpoint_url: Optional[str] = None,
+        redis_url: Optional[str] = None,
+    ):
         """
         Initialize the translation service.
 
         Args:
             region_name: AWS region for Translate service
+            cache_size: Maximum number of cached translations, 0 disables
+                (defaults to TRANSLATE_CACHE_SIZE, else 10000)
+            endpoint_url: Custom Translate endpoint, e.g. a FIPS endpoint
+                (defaults to AWS_TRANSLATE_ENDPOINT_URL, else the regional one)
+            redis_url: Redis URL for the shared translation cache (defaults to
+                TRANSLATE_REDIS_URL, else no shared cache)
         """
         self.region_name = region_name
+        self.endpoint_url = endpoint_url or os.environ.get("AWS_TRANSLATE_ENDPOINT_URL")
         self.aws_available = False
         self.translate_client = None
+        if cache_size is None:
+            cache_size = int(os.environ.get("TRANSLATE_CACHE_SIZE", 10000))
+        self._translate_cached = lru_cache(maxsize=cache_size)(self._translate)
+        self.redis_client = None
+
+        redis_url = redis_url or os.environ.get("TRANSLATE_REDIS_URL")
+        if redis_url:
+            if redis is None:
+                logger.warning("⚠ TRANSLATE_REDIS_URL set but redis is not installed")
+            else:
+                pool = redis.BlockingConnectionPool.from_url(
+                    redis_url,
+                    max_connections=REDIS_MAX_CONNECTIONS,
+                    socket_timeout=REDIS_SOCKET_TIMEOUT,
+                    socket_connect_timeout=REDIS_SOCKET_TIMEOUT,
+                )
+                self.redis_client = redis.Redis(connection_pool=pool)
+                logger.info("✓ Redis translation cache enabled")
 
         try:
-            self.translate_client = boto3.client("translate", region_name=region_name)
+            self.translate_client = boto3.client(
+                "translate",
+                region_name=region_name,
+                endpoint_url=self.endpoint_url,
+                config=TRANSLATE_CLIENT_CONFIG,
+            )
             self.aws_available = True
             logger.info("✓ AWS Translate client initialized")
         except (NoCredentialsError, Exception) as e:
@@ -58,13 +202,12 @@ class TranslationService:
         if target_language == "en":
             return text
 
+        # Speech-to-text emits empty "no speech" fragments; nothing to translate
+        if not text or text.isspace():
+            return text
+
         try:
-            response = self.translate_client.translate_text(
-                Text=text,
-                SourceLanguageCode=source_language,
-                TargetLanguageCode=target_language,
-            )
-            return response["TranslatedText"]
+            return self._translate_cached(text, target_language, source_language)
         except ClientError as e:
             logger.error(f"Translation error: {e}")
             return text
@@ -72,6 +215,53 @@ class TranslationService:
             logger.error(f"Unexpected translation error: {e}")
             return text
 
+    def _translate(self, text: str, target_language: str, source_language: str) -> str:
+        """Call AWS Translate; exceptions propagate so they are never cached."""
+        key = None
+        if self.redis_client is not None:
+            key = self._redis_key(text, target_language, source_language)
+            try:
+                cached = self.redis_client.get(key)
+                if cached is not None:
+                    return cached.decode("utf-8")
+            except Exception as e:
+                logger.warning(f"Redis cache read failed: {e}")
+                key = None
+
+        response = self.translate_client.translate_text(
+            Text=text,
+            SourceLanguageCode=source_language,
+            TargetLanguageCode=target_language,
+        )
+        translated_text = response["TranslatedText"]
+
+        if key is not None:
+            try:
+                self.redis_client.setex(key, REDIS_CACHE_TTL, translated_text)
+            except Exception as e:
+                logger.warning(f"Redis cache write failed: {e}")
+
+        return translated_text
+
+    @staticmethod
+    def _redis_key(text: str, target_language: str, source_language: str) -> bytes:
+        """Build a compact Redis key; MD5 is only used for hashing, not security."""
+        digest = hashlib.md5(text.encode("utf-8"), usedforsecurity=False).digest()
+        return b"t:v1:" + digest + f":{source_language}:{target_language}".encode()
+
+    def cache_info(self):
+        """
+        Get translation cache statistics.
+
+        Returns:
+            functools cache info with hits, misses, maxsize and currsize
+        """
+        return self._translate_cached.cache_info()
+
+    def cache_clear(self) -> None:
+        """Discard all cached translations."""
+        self._translate_cached.cache_clear()
+
     def is_available(self) -> bool:
         """
         Check if AWS Translate is available.
@@ -100,6 +290,9 @@ class MessageHandler:
     MESSAGE_TYPE_TOKEN_RESPONSE = "token_response"
     MESSAGE_TYPE_ERROR = "error"
 
+    # Error text for requests with a missing or wrong API key
+    ERROR_UNAUTHORIZED = "Unauthorized: Invalid API key"
+
     def __init__(
         self,
         translation_service: TranslationService,
@@ -118,20 +311,29 @@ class MessageHandler:
         self.api_key = api_key
         self.token_generator = token_generator
 
+        # Digest of the configured key, computed once for validate_api_key
+        self._api_key_digest = (
+            hashlib.sha256(api_key.encode("utf-8")).digest() if api_key else None
+        )
+
     def validate_api_key(self, provided_key: str) -> bool:
         """
         Validate an API key using constant-time comparison.
 
+        Both keys are compared as SHA-256 digests, so the comparison always
+        covers 32 bytes and does not leak the configured key's length.
+
         Args:
             provided_key: API key to validate
 
         Returns:
             True if valid or no API key configured, False otherwise
         """
-        if not self.api_key:
+        if not self._api_key_digest:
             return True  # No API key configured, allow access
 
-        return secrets.compare_digest(provided_key, self.api_key)
+        provided_digest = hashlib.sha256(provided_key.encode("utf-8")).digest()
+        return secrets.compare_digest(provided_digest, self._api_key_digest)
 
     def handle_set_language(
         self, client_id: Any, language: str, client_map: Any
@@ -164,73 +366,76 @@ class MessageHandler:
         self,
         text: str,
         timestamp: str,
-        api_key: str,
         client_map: Any,
     ) -> Dict[str, Any]:
         """
         Handle new text from speech-to-text application.
 
+        The request must already be authorized: callers check the sender's
+        key with validate_api_key() once, where the message arrives.
+
         Args:
             text: Original text to translate
             timestamp: Timestamp of the text
-            api_key: Provided API key for authentication
             client_map: Client map instance
 
         Returns:
-            Result dictionary with status and translations or error
+            Result dictionary with status and:
+                - payloads: Dict of language to (encoded translated_text
+                  message, client IDs), so each message is serialized once
+                  per language rather than once per client
         """
-        # Validate API key if configured
-        if not self.validate_api_key(api_key):
-            logger.warning("Unauthorized new_text attempt")
-            return {
-                "status": "error",
-                "error": "Unauthorized: Invalid API key",
-                "type": self.MESSAGE_TYPE_ERROR,
-            }
-
         logger.info(f"New text received: {text}")
 
-        # Prepare translations for all clients
-        # Optimize by translating once per unique target language, then map
-        # the translated text back to the clients that requested that language.
-        translations = []
+        # Clients grouped by target language come straight from the map's
+        # language index. Translate once per unique language, then fan the
+        # result out to every client that requested it. English clients get
+        # the original text.
+        lang_to_clients = client_map.get_clients_by_language()
+
+        # Translate all languages concurrently: latency is the slowest
+        # round trip rather than the sum of them. Empty or whitespace-only
+        # text is sent as-is without calling Translate at all.
+        needs_translation = bool(text) and not text.isspace()
+        futures = {
+            lang: _translate_pool.submit(
+                self.translation_service.translate_text, text, lang
+            )
+            for lang in lang_to_clients
+            if lang != "en" and needs_translation
+        }
 
-        # Collect unique languages requested by clients
-        clients = client_map.get_all_clients()
-        unique_langs = set(
-            client_info.get("lang", "en") for client_info in clients.values()
-        )
+        if futures:
+            wait(futures.values(), timeout=TRANSLATE_RESULT_TIMEOUT)
 
-        # Translate once per language (skip translation for English which uses original)
-        translations_by_lang = {}
-        for lang in unique_langs:
-            if lang == "en":
-                translations_by_lang[lang] = text
+        payloads: Dict[str, Any] = {}
+        for lang, client_ids in lang_to_clients.items():
+            future = futures.get(lang)
+            if future is None:
+                translated_text = text
+            elif future.done():
+                translated_text = future.result()
             else:
-                translations_by_lang[lang] = self.translation_service.translate_text(
-                    text, lang
-                )
+                logger.warning(f"Translation to {lang} timed out, sending original")
+                translated_text = text
 
-        # Build per-client translation payloads using cached translations
-        for client_id, client_info in clients.items():
-            target_language = client_info.get("lang", "en")
-            translated_text = translations_by_lang.get(target_language, text)
-
-            translations.append(
-                {
-                    "client_id": client_id,
-                    "translation": {
-                        "text": translated_text,
-                        "original": text,
-                        "timestamp": timestamp,
-                        "lang": target_language,
-                    },
-                }
+            # One payload per language, shared by all of its clients
+            translation = {
+                "text": translated_text,
+                "original": text,
+                "timestamp": timestamp,
+                "lang": lang,
+            }
+            payloads[lang] = (
+                encode_message(
+                    {"type": self.MESSAGE_TYPE_TRANSLATED_TEXT, "data": translation}
+                ),
+                client_ids,
             )
 
         return {
             "status": "success",
-            "translations": translations,
+            "payloads": payloads,
             "type": self.MESSAGE_TYPE_TRANSLATED_TEXT,
         }
 
@@ -273,7 +478,7 @@ class MessageHandler:
             logger.warning("Token generation attempted with invalid API key")
             return {
                 "type": self.MESSAGE_TYPE_ERROR,
-                "data": {"message": "Unauthorized: Invalid API key"},
+                "data": {"message": self.ERROR_UNAUTHORIZED},
             }
 
         # Check if token generator is available
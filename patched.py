@@ -2,4 +2,7 @@ from gevent import monkey
 
 monkey.patch_all()
 
-from server import app
+from server import app, main
+
+if __name__ == "__main__":
+    main()
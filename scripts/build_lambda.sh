@@ -26,7 +26,11 @@ cp "$PROJECT_ROOT/token_generator.py" "$BUILD_DIR/"
 
 # Install Python dependencies
 echo "Installing Python dependencies..."
-pip3 install -q -t "$BUILD_DIR" boto3 botocore
+# orjson ships compiled wheels, so fetch the ones matching the Lambda runtime
+pip3 install -q -t "$BUILD_DIR" \
+    --platform manylinux2014_x86_64 --implementation cp --python-version 3.12 \
+    --only-binary=:all: \
+    boto3 botocore orjson
 
 # Create deployment package
 echo "Creating deployment package..."
@@ -7,15 +7,34 @@ Receives text from speech-to-text app and broadcasts translations to web clients
 import os
 import json
 import logging
-from flask import Flask, send_from_directory, jsonify
+import mimetypes
+import queue
+import threading
+import time
+import uuid
+from types import MappingProxyType
+from flask import Flask, request, send_from_directory, jsonify
 from flask_sock import Sock
 from dotenv import load_dotenv
+from werkzeug.security import safe_join
 
 # Import our refactored modules
 from client_map import TranslationClientMap
-from message_handler import MessageHandler, TranslationService
+from message_handler import (
+    MessageHandler,
+    TranslationService,
+    decode_message,
+    encode_message,
+    intern_message_type,
+)
 from token_generator import TokenGenerator
 
+try:
+    from gevent import monkey
+    from gevent.pywsgi import WSGIServer
+except ImportError:  # Optional: main() falls back to the Werkzeug server
+    monkey = None
+
 # Load environment variables
 load_dotenv()
 
@@ -49,13 +68,29 @@ my_token_generator = TokenGenerator(
     region_name=os.environ.get("AWS_DEFAULT_REGION", "us-east-1")
 )
 
-# Initialize message handler with token generator
+# Initialize message handler with token generator. Translations are not
+# micro-batched: the single broadcast worker handles one utterance at a time,
+# so a batcher would never see two texts for a language and only add latency.
 message_handler = MessageHandler(translation_service, API_KEY, my_token_generator)
 
+# Only depends on aws_available, which is fixed at startup, so serialize the
+# greeting once and send the same frame to every new connection
+CONNECTION_STATUS_FRAME = encode_message(
+    message_handler.create_connection_status_message()
+)
+
 
 # Initialize client map
 client_map = TranslationClientMap()
 
+# Browser cache lifetime for static assets. Asset names aren't fingerprinted,
+# so keep this moderate to let updates reach clients.
+STATIC_MAX_AGE = int(os.environ.get("STATIC_MAX_AGE", "3600"))
+
+# Precompressed variants looked for next to each static file, in order of
+# preference (created at image build time)
+STATIC_ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
 # Load UI customization settings (for config.json endpoint)
 ui_config = {
     "logoFile": os.environ.get("LT_LOGO_FILE", ""),
@@ -64,6 +99,9 @@ ui_config = {
     "websocketUrl": "",  # Auto-detected by the client
 }
 
+# The settings are fixed for the life of the process, so serialize once
+UI_CONFIG_JSON = encode_message(ui_config)
+
 # Message type constants (for backward compatibility)
 MESSAGE_TYPE_CONNECTION_STATUS = message_handler.MESSAGE_TYPE_CONNECTION_STATUS
 MESSAGE_TYPE_SET_LANGUAGE = message_handler.MESSAGE_TYPE_SET_LANGUAGE
@@ -76,131 +114,326 @@ MESSAGE_TYPE_GENERATE_TOKEN = message_handler.MESSAGE_TYPE_GENERATE_TOKEN
 MESSAGE_TYPE_TOKEN_RESPONSE = message_handler.MESSAGE_TYPE_TOKEN_RESPONSE
 MESSAGE_TYPE_ERROR = message_handler.MESSAGE_TYPE_ERROR
 
+# Shared read-only default for messages without a "data" field
+_EMPTY = MappingProxyType({})
+
+# Frames buffered per client before the oldest is dropped
+SEND_QUEUE_SIZE = 8
+
+# For clients that accept batched frames, wait this long after the first
+# queued frame so later ones join the same send (0 = only batch frames that
+# are already waiting)
+FLUSH_MS = int(os.environ.get("FLUSH_MS", "0"))
+
+
+class ClientSender:
+    """
+    Bounded outbound queue for one WebSocket, drained by its own thread.
+
+    send() never blocks: when a slow client falls SEND_QUEUE_SIZE frames
+    behind, the oldest queued frame is dropped (captions are latest-wins).
+    Under the gevent worker the thread and queue are greenlet-based.
+
+    With batch enabled, frames queued together are sent as one JSON array
+    frame, so a burst of messages costs a single write.
+    """
+
+    def __init__(
+        self, ws, client_id, maxsize=SEND_QUEUE_SIZE, batch=False, flush_ms=None
+    ):
+        self.ws = ws
+        self.client_id = client_id
+        self.batch = batch
+        self.flush_window = (FLUSH_MS if flush_ms is None else flush_ms) / 1000
+        self._queue = queue.Queue(maxsize=maxsize)
+        # Guards _closed so nothing is queued after the close sentinel, which
+        # could otherwise be evicted as the oldest frame
+        self._lock = threading.Lock()
+        self._closed = False
+        self._thread = threading.Thread(
+            target=self._run, name=f"send-{client_id[:8]}", daemon=True
+        )
+        self._thread.start()
+
+    def send(self, payload):
+        """Queue a frame, dropping the oldest one if the queue is full."""
+        with self._lock:
+            if not self._closed:
+                self._put(payload)
+
+    def close(self):
+        """Stop the sender thread once it has sent what is already queued."""
+        with self._lock:
+            if not self._closed:
+                self._closed = True
+                self._put(None)
+
+    def _put(self, item):
+        while True:
+            try:
+                self._queue.put_nowait(item)
+                return
+            except queue.Full:
+                try:
+                    self._queue.get_nowait()
+                    logger.debug(f"Send queue full for {self.client_id}, dropped frame")
+                except queue.Empty:
+                    pass
+
+    def _next_frames(self):
+        """Block for the next frame, plus any that can share its send."""
+        frames = [self._queue.get()]
+        if self.batch and frames[0] is not None:
+            if self.flush_window:
+                time.sleep(self.flush_window)
+            while frames[-1] is not None:
+                try:
+                    frames.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+        return frames
+
+    def _run(self):
+        while True:
+            frames = self._next_frames()
+            closing = frames[-1] is None
+            if closing:
+                frames.pop()
+            if frames:
+                try:
+                    # Frames are serialized JSON, so joining them gives an array
+                    if len(frames) == 1:
+                        payload = frames[0]
+                    else:
+                        payload = b"[%b]" % b",".join(frames)
+                    self.ws.send(payload)
+                except Exception as e:
+                    logger.error(f"Error sending to client {self.client_id}: {e}")
+                    # Stop accepting frames nobody will ever send
+                    with self._lock:
+                        self._closed = True
+                    client_map.delete_client(self.client_id)
+                    return
+            if closing:
+                return
+
 
 def send_message(ws, msg_type, data):
     """Send a WebSocket message."""
     message = {"type": msg_type, "data": data}
-    ws.send(json.dumps(message))
+    # Sent as UTF-8 bytes (a binary frame), skipping a decode/re-encode
+    ws.send(encode_message(message))
 
 
 def broadcast_message(msg_type, data, exclude_client=None):
     """Broadcast a message to all connected clients except the excluded one."""
     message = {"type": msg_type, "data": data}
-    message_json = json.dumps(message)
+    # Serialize once for every recipient
+    message_json = encode_message(message)
+
+    # Each client's ClientSender only queues the frame, so a slow client
+    # can't hold up the rest; failed sends remove the client
+    for client_id, client_info in client_map.snapshot():
+        if client_id != exclude_client:
+            client_info.ws.send(message_json)
 
-    clients_to_remove = []
-    for client_id, client_info in client_map.get_all_clients().items():
-        if client_id == exclude_client:
+
+def _is_fresh_variant(path, variant_path):
+    """Whether a precompressed variant exists and is not older than its source."""
+    try:
+        return os.stat(variant_path).st_mtime >= os.stat(path).st_mtime
+    except OSError:
+        return False
+
+
+def _send_static(filename, max_age=None):
+    """
+    Send a file from the static directory, preferring a precompressed
+    variant (e.g. main.css.gz) when the client accepts its encoding.
+
+    Paths resolve against app.static_folder, not the working directory.
+    A variant older than its source file is stale and ignored.
+
+    Responses carry an ETag, so browsers revalidate with a cheap 304.
+    """
+    static_folder = app.static_folder
+    path = safe_join(static_folder, filename)
+    for encoding, suffix in STATIC_ENCODINGS:
+        # Quality 0 (e.g. "gzip;q=0") means the encoding is refused
+        if path is None or not request.accept_encodings[encoding]:
             continue
-        try:
-            client_info["ws"].send(message_json)
-        except Exception as e:
-            logger.error(f"Error sending to client {client_id}: {e}")
-            clients_to_remove.append(client_id)
+        if not _is_fresh_variant(path, path + suffix):
+            continue
+        mimetype = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+        response = send_from_directory(
+            static_folder, filename + suffix, mimetype=mimetype, max_age=max_age
+        )
+        response.headers["Content-Encoding"] = encoding
+        response.vary.add("Accept-Encoding")
+        return response
 
-    # Remove disconnected clients
-    for client_id in clients_to_remove:
-        client_map.delete_client(client_id)
+    return send_from_directory(static_folder, filename, max_age=max_age)
 
 
 @app.route("/")
 def index():
     """Serve the main web interface."""
-    return send_from_directory("static", "index.html")
+    # Always revalidated so new releases are picked up immediately
+    return _send_static("index.html")
 
 
 @app.route("/<path:filename>")
 def serve_static(filename):
     """Serve static files (CSS, images, etc.)."""
-    return send_from_directory("static", filename)
+    if filename == "config.json":
+        # Deployment configuration: always revalidate. Without a static
+        # config.json, serve the settings from the environment.
+        if not os.path.isfile(os.path.join(app.static_folder, filename)):
+            return app.response_class(UI_CONFIG_JSON, mimetype="application/json")
+        return _send_static(filename)
+    return _send_static(filename, max_age=STATIC_MAX_AGE)
+
+
+# Health probes hit this often; only the client count changes, so fill it
+# into a pre-serialized body instead of building and encoding a dict
+HEALTH_TEMPLATE = (
+    b'{"status":"healthy","aws_translate":'
+    + (b"true" if aws_available else b"false")
+    + b',"connected_clients":%d}'
+)
 
 
 @app.route("/health")
 def health():
     """Health check endpoint."""
-    return {
-        "status": "healthy",
-        "aws_translate": aws_available,
-        "connected_clients": client_map.count(),
-    }
+    return app.response_class(
+        HEALTH_TEMPLATE % client_map.count(), mimetype="application/json"
+    )
+
+
+def _do_set_language(ws, client_id, msg_data):
+    """Handle language preference from client."""
+    language = msg_data.get("lang", "en")
+    response = message_handler.handle_set_language(client_id, language, client_map)
+    send_message(ws, response["type"], response["data"])
+
+
+def _do_generate_token(ws, client_id, msg_data):
+    """Handle token generation request from speech-to-text client."""
+    provided_key = msg_data.get("api_key", "")
+    response = message_handler.handle_generate_token(provided_key)
+    send_message(ws, response["type"], response["data"])
+
+
+def _do_new_text(ws, client_id, msg_data):
+    """Queue new text from the speech-to-text application for broadcast."""
+    # Checked before queueing so unauthorized senders can't fill the queue
+    if not message_handler.validate_api_key(msg_data.get("api_key", "")):
+        logger.warning(f"Unauthorized new_text attempt from {client_id}")
+        error_msg = message_handler.create_error_message(
+            message_handler.ERROR_UNAUTHORIZED
+        )
+        send_message(ws, error_msg["type"], error_msg["data"])
+        return
+
+    _start_broadcast_worker()
+    try:
+        _broadcast_queue.put_nowait((ws, client_id, msg_data))
+    except queue.Full:
+        logger.warning(f"Broadcast queue full, dropping text from {client_id}")
+        error_msg = message_handler.create_error_message("Server busy: text dropped")
+        send_message(ws, error_msg["type"], error_msg["data"])
+
+
+def _start_broadcast_worker():
+    """Start the broadcast worker thread on first use."""
+    global _broadcast_thread
+    with _broadcast_lock:
+        if _broadcast_thread is None:
+            _broadcast_thread = threading.Thread(
+                target=_broadcast_worker, name="broadcast", daemon=True
+            )
+            _broadcast_thread.start()
+
+
+def _broadcast_worker():
+    """Translate and broadcast queued new_text messages, in arrival order."""
+    while True:
+        ws, client_id, msg_data = _broadcast_queue.get()
+        try:
+            _broadcast_new_text(ws, client_id, msg_data)
+        except Exception as e:
+            logger.error(f"Error broadcasting text from client {client_id}: {e}")
+
+
+def _broadcast_new_text(ws, client_id, msg_data):
+    """Translate authorized new text and send it to every client in its language."""
+    original_text = msg_data.get("text", "")
+    timestamp = msg_data.get("timestamp", "")
+
+    result = message_handler.handle_new_text(original_text, timestamp, client_map)
+
+    # Broadcast translations to all clients, reusing one serialized message
+    # per language. Sends only queue on each client's ClientSender.
+    for payload, client_ids in result["payloads"].values():
+        for client_info in client_map.get_clients_bulk(client_ids).values():
+            if client_info.ws:
+                client_info.ws.send(payload)
+
+
+# new_text is translated and broadcast off the sender's receive loop, so it
+# can read the next utterance straight away. A single worker keeps captions
+# in order; translations within an utterance still run concurrently. The
+# queue is bounded so a sender outpacing Translate can't grow memory without
+# limit, and the worker only starts once text arrives.
+BROADCAST_QUEUE_SIZE = 32
+_broadcast_queue = queue.Queue(maxsize=BROADCAST_QUEUE_SIZE)
+_broadcast_lock = threading.Lock()
+_broadcast_thread = None
+
+# Message type -> handler taking (ws, client_id, msg_data), built once
+DISPATCH = {
+    MESSAGE_TYPE_SET_LANGUAGE: _do_set_language,
+    MESSAGE_TYPE_GENERATE_TOKEN: _do_generate_token,
+    MESSAGE_TYPE_NEW_TEXT: _do_new_text,
+}
 
 
 @sock.route("/ws")
 def websocket_handler(ws):
     """Handle WebSocket connections."""
-    client_id = id(ws)
-    client_map.add_client(client_id, language="en", ws=ws)
+    # Random rather than id(ws): object ids are reused once a socket is freed
+    client_id = uuid.uuid4().hex
+    # Every frame to this client, replies included, goes through its queue
+    # The browser opts in to batched frames; other clients (such as the
+    # speech-to-text app) always get one message per frame
+    sender = ClientSender(ws, client_id, batch=request.args.get("batch") == "1")
+    client_map.add_client(client_id, language="en", ws=sender)
     logger.info(f"Client connected: {client_id} (Total: {client_map.count()})")
 
     # Send connection status
     try:
-        connection_msg = message_handler.create_connection_status_message()
-        send_message(ws, connection_msg["type"], connection_msg["data"])
+        sender.send(CONNECTION_STATUS_FRAME)
     except Exception as e:
         logger.error(f"Error sending connection status: {e}")
 
+    # Hoisted out of the receive loop
+    dispatch_get = DISPATCH.get
+    receive = ws.receive
+    loads = decode_message
+    intern_type = intern_message_type
+
     try:
         while True:
-            data = ws.receive()
+            data = receive()
             if data is None:
                 break
 
             try:
-                message = json.loads(data)
-                msg_type = message.get("type")
-                msg_data = message.get("data", {})
-
-                if msg_type == MESSAGE_TYPE_SET_LANGUAGE:
-                    # Handle language preference from client
-                    language = msg_data.get("lang", "en")
-                    response = message_handler.handle_set_language(
-                        client_id, language, client_map
-                    )
-                    send_message(ws, response["type"], response["data"])
-
-                elif msg_type == MESSAGE_TYPE_GENERATE_TOKEN:
-                    # Handle token generation request from speech-to-text client
-                    provided_key = msg_data.get("api_key", "")
-                    response = message_handler.handle_generate_token(provided_key)
-                    send_message(ws, response["type"], response["data"])
-
-                elif msg_type == MESSAGE_TYPE_NEW_TEXT:
-                    # Handle new text from speech-to-text application
-                    original_text = msg_data.get("text", "")
-                    timestamp = msg_data.get("timestamp", "")
-                    provided_key = msg_data.get("api_key", "")
-
-                    result = message_handler.handle_new_text(
-                        original_text, timestamp, provided_key, client_map
-                    )
-
-                    if result["status"] == "error":
-                        logger.warning(
-                            f"Unauthorized new_text attempt from {client_id}"
-                        )
-                        error_msg = message_handler.create_error_message(
-                            result["error"]
-                        )
-                        send_message(ws, error_msg["type"], error_msg["data"])
-                        continue
-
-                    # Broadcast translations to all clients
-                    for translation_info in result["translations"]:
-                        target_client_id = translation_info["client_id"]
-                        translation = translation_info["translation"]
-                        client_info = client_map.get_client(target_client_id)
-
-                        if client_info and client_info.get("ws"):
-                            try:
-                                send_message(
-                                    client_info["ws"],
-                                    MESSAGE_TYPE_TRANSLATED_TEXT,
-                                    translation,
-                                )
-                            except Exception as e:
-                                logger.error(
-                                    f"Error sending to client {target_client_id}: {e}"
-                                )
+                message = loads(data)
+                handler = dispatch_get(intern_type(message.get("type")))
+                if handler is not None:
+                    handler(sender, client_id, message.get("data", _EMPTY))
 
             except json.JSONDecodeError as e:
                 logger.error(f"Invalid JSON from client {client_id}: {e}")
@@ -211,6 +444,7 @@ def websocket_handler(ws):
         logger.error(f"WebSocket error for client {client_id}: {e}")
     finally:
         client_map.delete_client(client_id)
+        sender.close()
         logger.info(f"Client disconnected: {client_id} (Total: {client_map.count()})")
 
 
@@ -228,7 +462,13 @@ def main():
     logger.info(f"AWS Translate: {'Available' if aws_available else 'Not Available'}")
     logger.info("=" * 60)
 
-    app.run(host=host, port=port, debug=debug)
+    if monkey is not None and monkey.is_module_patched("socket") and not debug:
+        # Started via patched.py: serve with gevent so every WebSocket runs in
+        # a greenlet and blocking I/O yields instead of holding up the rest
+        logger.info("Serving with gevent WSGIServer")
+        WSGIServer((host, port), app).serve_forever()
+    else:
+        app.run(host=host, port=port, debug=debug)
 
 
 if __name__ == "__main__":
@@ -1,7 +1,6 @@
 package main
 
 import (
-	"bytes"
 	"context"
 	"encoding/binary"
 	"flag"
@@ -42,6 +41,20 @@ type WSMessage struct {
 	Data map[string]interface{} `json:"data"`
 }
 
+// NewTextMessage is the new_text message sent for every recognized phrase.
+// A fixed struct encodes without building a map per utterance.
+type NewTextMessage struct {
+	Type string      `json:"type"`
+	Data NewTextData `json:"data"`
+}
+
+// NewTextData is the payload of a new_text message
+type NewTextData struct {
+	Text      string `json:"text"`
+	Timestamp string `json:"timestamp"`
+	APIKey    string `json:"api_key,omitempty"`
+}
+
 // TokenResponse represents the response from the generate_token endpoint
 type TokenResponse struct {
 	Status      string         `json:"status"`
@@ -144,6 +157,7 @@ type SpeechToText struct {
 	deviceIndex       int
 	wsConn            *websocket.Conn
 	stream            *portaudio.Stream
+	device            *portaudio.DeviceInfo // resolved input device, cached
 	isRunning         bool
 	ctx               context.Context
 	awsRegion         string
@@ -520,18 +534,16 @@ func (s *SpeechToText) readMessages() {
 	}
 }
 
-// sendMessage sends a WebSocket message to the server
-func (s *SpeechToText) sendMessage(msgType string, data map[string]interface{}) error {
+// sendNewText sends a recognized phrase to the server
+func (s *SpeechToText) sendNewText(text, timestamp string) error {
 	if s.wsConn == nil {
 		return fmt.Errorf("WebSocket connection not established")
 	}
 
-	msg := WSMessage{
-		Type: msgType,
-		Data: data,
-	}
-
-	return s.wsConn.WriteJSON(msg)
+	return s.wsConn.WriteJSON(NewTextMessage{
+		Type: MessageTypeNewText,
+		Data: NewTextData{Text: text, Timestamp: timestamp, APIKey: s.apiKey},
+	})
 }
 
 // calibrateMicrophone adjusts for ambient noise
@@ -550,26 +562,10 @@ func (s *SpeechToText) calibrateMicrophone() error {
 	}
 
 	// Get device info
-	var device *portaudio.DeviceInfo
-	var err error
-
-	if s.deviceIndex >= 0 {
-		allDevices, err := portaudio.Devices()
-		if err != nil {
-			portaudio.Terminate()
-			return fmt.Errorf("failed to get devices: %v", err)
-		}
-		if s.deviceIndex >= len(allDevices) {
-			portaudio.Terminate()
-			return fmt.Errorf("device index %d out of range", s.deviceIndex)
-		}
-		device = allDevices[s.deviceIndex]
-	} else {
-		device, err = portaudio.DefaultInputDevice()
-		if err != nil {
-			portaudio.Terminate()
-			return fmt.Errorf("failed to get default device: %v", err)
-		}
+	device, err := s.inputDevice()
+	if err != nil {
+		portaudio.Terminate()
+		return err
 	}
 
 	// Create stream parameters
@@ -604,11 +600,45 @@ func (s *SpeechToText) calibrateMicrophone() error {
 	return nil
 }
 
-// int16ToBytes converts int16 slice to byte slice
+// inputDevice returns the configured input device, enumerating PortAudio
+// devices only on first use.  PortAudio must already be initialized, and the
+// cached DeviceInfo stays valid until portaudio.Terminate is called.
+func (s *SpeechToText) inputDevice() (*portaudio.DeviceInfo, error) {
+	if s.device != nil {
+		return s.device, nil
+	}
+
+	var device *portaudio.DeviceInfo
+	if s.deviceIndex >= 0 {
+		allDevices, err := portaudio.Devices()
+		if err != nil {
+			return nil, fmt.Errorf("failed to get devices: %v", err)
+		}
+		if s.deviceIndex >= len(allDevices) {
+			return nil, fmt.Errorf("device index %d out of range", s.deviceIndex)
+		}
+		device = allDevices[s.deviceIndex]
+	} else {
+		var err error
+		device, err = portaudio.DefaultInputDevice()
+		if err != nil {
+			return nil, fmt.Errorf("failed to get default device: %v", err)
+		}
+	}
+
+	s.device = device
+	return device, nil
+}
+
+// int16ToBytes converts int16 slice to little-endian PCM bytes.
+// The output is allocated once at its final size and filled in place,
+// avoiding bytes.Buffer growth and binary.Write's reflection per chunk.
 func int16ToBytes(samples []int16) []byte {
-	buf := new(bytes.Buffer)
-	binary.Write(buf, binary.LittleEndian, samples)
-	return buf.Bytes()
+	buf := make([]byte, len(samples)*2)
+	for i, s := range samples {
+		binary.LittleEndian.PutUint16(buf[i*2:], uint16(s))
+	}
+	return buf
 }
 
 // listenAndTranscribe starts listening and transcribing using the configured engine.
@@ -631,23 +661,10 @@ func (s *SpeechToText) listenAndTranscribe() error {
 	fmt.Println("\nListening... Speak into your microphone.")
 	fmt.Println("Press Ctrl+C to stop.")
 
-	// Get device info
-	var device *portaudio.DeviceInfo
-	var err error
-	if s.deviceIndex >= 0 {
-		allDevices, err := portaudio.Devices()
-		if err != nil {
-			return fmt.Errorf("failed to get devices: %v", err)
-		}
-		if s.deviceIndex >= len(allDevices) {
-			return fmt.Errorf("device index %d out of range", s.deviceIndex)
-		}
-		device = allDevices[s.deviceIndex]
-	} else {
-		device, err = portaudio.DefaultInputDevice()
-		if err != nil {
-			return fmt.Errorf("failed to get default device: %v", err)
-		}
+	// Get device info (resolved once, during calibration)
+	device, err := s.inputDevice()
+	if err != nil {
+		return err
 	}
 
 	// Create stream parameters
@@ -709,8 +726,23 @@ func (s *SpeechToText) listenAndTranscribe() error {
 				copy(chunk, buffer)
 				select {
 				case audioIn <- chunk:
-				case <-engineCtx.Done():
-					return
+				default:
+					// The engine has fallen a full channel behind (e.g. slow
+					// whisper inference). Drop the oldest chunk rather than
+					// stall capture, which would overflow PortAudio's buffer
+					// and push transcription further from real time.
+					select {
+					case <-audioIn:
+						if s.verbose {
+							log.Printf("Transcription falling behind; dropped oldest audio chunk")
+						}
+					default:
+					}
+					select {
+					case audioIn <- chunk:
+					case <-engineCtx.Done():
+						return
+					}
 				}
 			}
 		}
@@ -731,14 +763,7 @@ loop:
 
 			// Broadcast to server
 			if s.wsConn != nil {
-				data := map[string]interface{}{
-					"text":      text,
-					"timestamp": timestamp,
-				}
-				if s.apiKey != "" {
-					data["api_key"] = s.apiKey
-				}
-				if err := s.sendMessage(MessageTypeNewText, data); err != nil {
+				if err := s.sendNewText(text, timestamp); err != nil {
 					log.Printf("Failed to send message: %v", err)
 					if isWebSocketClosedError(err) {
 						// Don't attempt reconnection during shutdown
@@ -2,6 +2,7 @@ package main
 
 import (
 	"context"
+	"encoding/json"
 	"fmt"
 	"strings"
 	"sync"
@@ -256,6 +257,42 @@ func TestMaxTokenRefreshRetriesConstant(t *testing.T) {
 	}
 }
 
+// TestNewTextMessageJSON tests the wire format of new_text messages
+func TestNewTextMessageJSON(t *testing.T) {
+	tests := []struct {
+		name     string
+		apiKey   string
+		expected string
+	}{
+		{
+			name:     "with api key",
+			apiKey:   "secret",
+			expected: `{"type":"new_text","data":{"text":"Hello","timestamp":"12:00:00","api_key":"secret"}}`,
+		},
+		{
+			name:     "without api key",
+			apiKey:   "",
+			expected: `{"type":"new_text","data":{"text":"Hello","timestamp":"12:00:00"}}`,
+		},
+	}
+
+	for _, tt := range tests {
+		t.Run(tt.name, func(t *testing.T) {
+			msg := NewTextMessage{
+				Type: MessageTypeNewText,
+				Data: NewTextData{Text: "Hello", Timestamp: "12:00:00", APIKey: tt.apiKey},
+			}
+			encoded, err := json.Marshal(msg)
+			if err != nil {
+				t.Fatalf("json.Marshal() error = %v", err)
+			}
+			if string(encoded) != tt.expected {
+				t.Errorf("json.Marshal() = %s, want %s", encoded, tt.expected)
+			}
+		})
+	}
+}
+
 // TestIsWebSocketClosedError tests the websocket closed error detection
 func TestIsWebSocketClosedError(t *testing.T) {
 	tests := []struct {
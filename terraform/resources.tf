@@ -289,6 +289,7 @@ resource "aws_lambda_function" "websocket_handler" {
       {
         DYNAMODB_TABLE_NAME = aws_dynamodb_table.connections.name
         API_KEY             = var.api_key
+        APIGW_ENDPOINT      = "https://${local.api_domain_name}"
       },
       var.enable_token_generation ? {
         TRANSCRIBE_ROLE_ARN = aws_iam_role.transcribe_client[0].arn
@@ -3,9 +3,16 @@
 Unit tests for client mapping classes.
 """
 
+import threading
 import unittest
-from unittest.mock import Mock, patch, MagicMock
-from client_map import TranslationClientMap, TranslationClientMapDynamoDB
+from unittest.mock import Mock, patch
+from botocore.exceptions import ClientError
+from client_map import (
+    BATCH_MAX_RETRIES,
+    DYNAMODB_CLIENT_CONFIG,
+    TranslationClientMap,
+    TranslationClientMapDynamoDB,
+)
 
 
 class TestTranslationClientMap(unittest.TestCase):
@@ -22,8 +29,8 @@ class TestTranslationClientMap(unittest.TestCase):
 
         client = self.client_map.get_client("client1")
         self.assertIsNotNone(client)
-        self.assertEqual(client["lang"], "es")
-        self.assertEqual(client["ws"], ws_mock)
+        self.assertEqual(client.lang, "es")
+        self.assertEqual(client.ws, ws_mock)
 
     def test_add_client_default_language(self):
         """Test adding a client with default language."""
@@ -32,7 +39,7 @@ class TestTranslationClientMap(unittest.TestCase):
 
         client = self.client_map.get_client("client2")
         self.assertIsNotNone(client)
-        self.assertEqual(client["lang"], "en")
+        self.assertEqual(client.lang, "en")
 
     def test_delete_client(self):
         """Test deleting a client from the map."""
@@ -56,8 +63,8 @@ class TestTranslationClientMap(unittest.TestCase):
 
         client = self.client_map.get_client("client1")
         self.assertIsNotNone(client)
-        self.assertEqual(client["lang"], "de")
-        self.assertEqual(client["ws"], ws_mock)
+        self.assertEqual(client.lang, "de")
+        self.assertEqual(client.ws, ws_mock)
 
     def test_get_nonexistent_client(self):
         """Test getting a client that doesn't exist."""
@@ -75,8 +82,86 @@ class TestTranslationClientMap(unittest.TestCase):
         self.assertEqual(len(all_clients), 2)
         self.assertIn("client1", all_clients)
         self.assertIn("client2", all_clients)
-        self.assertEqual(all_clients["client1"]["lang"], "es")
-        self.assertEqual(all_clients["client2"]["lang"], "fr")
+        self.assertEqual(all_clients["client1"].lang, "es")
+        self.assertEqual(all_clients["client2"].lang, "fr")
+
+    def test_get_clients_bulk(self):
+        """Test looking up several clients at once."""
+        self.client_map.add_client("client1", "es", Mock())
+        self.client_map.add_client("client2", "fr", Mock())
+
+        clients = self.client_map.get_clients_bulk(["client1", "client2", "missing"])
+
+        self.assertEqual(set(clients), {"client1", "client2"})
+        self.assertEqual(clients["client2"].lang, "fr")
+
+    def test_snapshot_allows_deletes(self):
+        """Test deleting clients while iterating a snapshot."""
+        self.client_map.add_client("client1", "es", Mock())
+        self.client_map.add_client("client2", "fr", Mock())
+
+        # Deleting while iterating must not raise
+        seen = []
+        for client_id, client_info in self.client_map.snapshot():
+            seen.append((client_id, client_info.lang))
+            self.client_map.delete_client(client_id)
+
+        self.assertEqual(seen, [("client1", "es"), ("client2", "fr")])
+        self.assertEqual(self.client_map.count(), 0)
+
+    def test_snapshot_concurrent_mutation(self):
+        """Test that snapshots stay consistent while other threads mutate."""
+        for i in range(100):
+            self.client_map.add_client(f"client{i}", "es", Mock())
+
+        def churn():
+            for i in range(100, 2000):
+                self.client_map.add_client(f"client{i}", "fr", Mock())
+                self.client_map.delete_client(f"client{i - 100}")
+
+        worker = threading.Thread(target=churn)
+        worker.start()
+        try:
+            while worker.is_alive():
+                for client_id, client_info in self.client_map.snapshot():
+                    self.assertIn(client_info.lang, ("es", "fr"))
+        finally:
+            worker.join()
+
+        self.assertEqual(self.client_map.count(), 100)
+
+    def test_delete_clients_bulk(self):
+        """Test removing several clients at once."""
+        self.client_map.add_client("client1", "es", Mock())
+        self.client_map.add_client("client2", "fr", Mock())
+        self.client_map.add_client("client3", "de", Mock())
+
+        self.client_map.delete_clients_bulk(["client1", "client3", "unknown"])
+
+        self.assertEqual(list(self.client_map.get_all_clients()), ["client2"])
+
+    def test_get_clients_by_language(self):
+        """Test that the language index follows adds, updates and deletes."""
+        self.client_map.add_client("client1", "es", Mock())
+        self.client_map.add_client("client2", "fr", Mock())
+        self.client_map.add_client("client3", "es", Mock())
+
+        self.assertEqual(
+            self.client_map.get_clients_by_language(),
+            {"es": ("client1", "client3"), "fr": ("client2",)},
+        )
+
+        self.client_map.update_language("client2", "es")
+        self.client_map.add_client("client1", "de", Mock())
+        self.client_map.delete_client("client3")
+
+        self.assertEqual(
+            self.client_map.get_clients_by_language(),
+            {"es": ("client2",), "de": ("client1",)},
+        )
+
+        self.client_map.delete_clients_bulk(["client1", "client2"])
+        self.assertEqual(self.client_map.get_clients_by_language(), {})
 
     def test_update_language(self):
         """Test updating a client's language preference."""
@@ -87,7 +172,7 @@ class TestTranslationClientMap(unittest.TestCase):
         self.assertTrue(result)
 
         client = self.client_map.get_client("client1")
-        self.assertEqual(client["lang"], "fr")
+        self.assertEqual(client.lang, "fr")
 
     def test_update_language_nonexistent_client(self):
         """Test updating language for a nonexistent client."""
@@ -124,11 +209,15 @@ class TestTranslationClientMapDynamoDB(unittest.TestCase):
     @patch("client_map.boto3.resource")
     def setUp(self, mock_boto_resource):
         """Set up test fixtures with mocked DynamoDB."""
-        self.mock_table = MagicMock()
-        self.mock_dynamodb = MagicMock()
+        self.mock_boto_resource = mock_boto_resource
+        self.mock_table = Mock()
+        self.mock_dynamodb = Mock()
         self.mock_dynamodb.Table.return_value = self.mock_table
+        self.mock_batch_write = self.mock_dynamodb.meta.client.batch_write_item
+        self.mock_batch_write.return_value = {"UnprocessedItems": {}}
         mock_boto_resource.return_value = self.mock_dynamodb
 
+        # No background flusher, so only explicit flush() calls write in tests
         self.client_map = TranslationClientMapDynamoDB("test-table", "us-east-1")
 
     def test_initialization(self):
@@ -137,22 +226,77 @@ class TestTranslationClientMapDynamoDB(unittest.TestCase):
         self.assertIsNotNone(self.client_map.table)
         self.assertEqual(self.client_map.table_name, "test-table")
         self.assertEqual(self.client_map.region_name, "us-east-1")
+        self.mock_boto_resource.assert_called_once_with(
+            "dynamodb", region_name="us-east-1", config=DYNAMODB_CLIENT_CONFIG
+        )
 
     def test_add_client(self):
         """Test adding a client to DynamoDB."""
         ws_mock = Mock()
         self.client_map.add_client("client1", "es", ws_mock)
-
-        # Verify DynamoDB put_item was called
-        self.mock_table.put_item.assert_called_once_with(
-            Item={"client_id": "client1", "lang": "es"}
+        self.client_map.flush()
+
+        # Verify the put was written through BatchWriteItem
+        self.mock_batch_write.assert_called_once_with(
+            RequestItems={
+                "test-table": [
+                    {"PutRequest": {"Item": {"client_id": "client1", "lang": "es"}}}
+                ]
+            }
         )
 
         # Verify local cache was updated
         client = self.client_map.get_client("client1")
         self.assertIsNotNone(client)
-        self.assertEqual(client["lang"], "es")
-        self.assertEqual(client["ws"], ws_mock)
+        self.assertEqual(client.lang, "es")
+        self.assertEqual(client.ws, ws_mock)
+
+    def test_add_client_rejects_non_string_id(self):
+        """Test that non-string client IDs are rejected before any write."""
+        with self.assertRaises(TypeError):
+            self.client_map.add_client(12345, "es")
+
+        self.assertFalse(self.client_map.exists(12345))
+        self.client_map.flush()
+        self.mock_batch_write.assert_not_called()
+
+    def test_writes_reject_non_string_ids(self):
+        """Test that every write rejects non-string client IDs up front."""
+        self.client_map.add_client("conn-1", "es")
+        self.client_map.flush()
+        self.mock_batch_write.reset_mock()
+
+        with self.assertRaises(TypeError):
+            self.client_map.update_language(12345, "fr")
+        with self.assertRaises(TypeError):
+            self.client_map.delete_client(12345, force=True)
+        with self.assertRaises(TypeError):
+            self.client_map.delete_clients_bulk(["conn-1", 12345])
+        with self.assertRaises(TypeError):
+            self.client_map.get_clients_bulk(["conn-1", 12345])
+
+        # The bulk delete is all-or-nothing, so conn-1 is untouched
+        self.assertTrue(self.client_map.exists("conn-1"))
+        self.client_map.flush()
+        self.mock_batch_write.assert_not_called()
+
+    def test_add_client_unchanged_skips_write(self):
+        """Test that re-adding a client with the same language is not written."""
+        self.client_map.add_client("client1", "es", Mock())
+        self.client_map.flush()
+        self.mock_batch_write.reset_mock()
+
+        ws_new = Mock()
+        self.client_map.add_client("client1", "es", ws_new)
+        self.client_map.flush()
+
+        self.mock_batch_write.assert_not_called()
+        self.assertIs(self.client_map.get_client("client1").ws, ws_new)
+
+        # A language change is still written
+        self.client_map.add_client("client1", "fr", ws_new)
+        self.client_map.flush()
+        self.mock_batch_write.assert_called_once()
 
     def test_delete_client(self):
         """Test deleting a client from DynamoDB."""
@@ -161,13 +305,156 @@ class TestTranslationClientMapDynamoDB(unittest.TestCase):
 
         self.client_map.delete_client("client1")
 
-        # Verify DynamoDB delete_item was called
-        self.mock_table.delete_item.assert_called_once_with(
-            Key={"client_id": "client1"}
+        # Verify local cache was cleared before any flush
+        self.assertFalse(self.client_map.exists("client1"))
+
+        self.client_map.flush()
+
+        # Put and delete for the same key are coalesced into the delete
+        self.mock_batch_write.assert_called_once_with(
+            RequestItems={
+                "test-table": [{"DeleteRequest": {"Key": {"client_id": "client1"}}}]
+            }
         )
 
-        # Verify local cache was cleared
-        self.assertIsNone(self.client_map.get_client("client1"))
+    def test_delete_unknown_client_skips_dynamodb(self):
+        """Test that deleting an uncached client does not touch DynamoDB."""
+        self.client_map.delete_client("unknown")
+        self.client_map.flush()
+
+        self.mock_batch_write.assert_not_called()
+
+    def test_delete_unknown_client_force(self):
+        """Test that force=True deletes an uncached client from DynamoDB."""
+        self.client_map.delete_client("unknown", force=True)
+        self.client_map.flush()
+
+        self.mock_batch_write.assert_called_once_with(
+            RequestItems={
+                "test-table": [{"DeleteRequest": {"Key": {"client_id": "unknown"}}}]
+            }
+        )
+
+    def test_delete_clients_bulk(self):
+        """Test that bulk deletes are written in batches of at most 25."""
+        for i in range(30):
+            self.client_map.add_client(f"client{i}", "es")
+        self.client_map.flush()
+        self.mock_batch_write.reset_mock()
+
+        self.client_map.delete_clients_bulk(
+            [f"client{i}" for i in range(30)] + ["unknown"]
+        )
+
+        self.assertEqual(self.client_map.count(), 0)
+        batches = [
+            c[1]["RequestItems"]["test-table"]
+            for c in self.mock_batch_write.call_args_list
+        ]
+        self.assertEqual([len(batch) for batch in batches], [25, 5])
+        deleted = [r["DeleteRequest"]["Key"]["client_id"] for b in batches for r in b]
+        self.assertNotIn("unknown", deleted)
+
+    def test_delete_clients_bulk_error_keeps_deletes_buffered(self):
+        """Test that a failed bulk delete is logged and retried on next flush."""
+        self.client_map.add_client("client1", "es")
+        self.client_map.flush()
+        self.mock_batch_write.side_effect = ClientError(
+            {"Error": {"Code": "ProvisionedThroughputExceededException"}},
+            "BatchWriteItem",
+        )
+
+        self.client_map.delete_clients_bulk(["client1"])
+        self.assertFalse(self.client_map.exists("client1"))
+
+        self.mock_batch_write.side_effect = None
+        self.mock_batch_write.reset_mock()
+        self.client_map.flush()
+
+        self.mock_batch_write.assert_called_once_with(
+            RequestItems={
+                "test-table": [{"DeleteRequest": {"Key": {"client_id": "client1"}}}]
+            }
+        )
+
+    def test_flush_batches_writes(self):
+        """Test that buffered writes are sent in batches of at most 25."""
+        for i in range(30):
+            self.client_map.add_client(f"client{i}", "es")
+
+        self.client_map.flush()
+
+        self.assertEqual(self.mock_batch_write.call_count, 2)
+        batch_sizes = [
+            len(c[1]["RequestItems"]["test-table"])
+            for c in self.mock_batch_write.call_args_list
+        ]
+        self.assertEqual(batch_sizes, [25, 5])
+
+    @patch("client_map.time.sleep")
+    def test_flush_retries_unprocessed_items(self, mock_sleep):
+        """Test that UnprocessedItems are retried with backoff."""
+        put = {"PutRequest": {"Item": {"client_id": "client1", "lang": "es"}}}
+        self.mock_batch_write.side_effect = [
+            {"UnprocessedItems": {"test-table": [put]}},
+            {"UnprocessedItems": {}},
+        ]
+
+        self.client_map.add_client("client1", "es")
+        self.client_map.flush()
+
+        self.assertEqual(self.mock_batch_write.call_count, 2)
+        self.assertEqual(
+            self.mock_batch_write.call_args_list[1][1]["RequestItems"],
+            {"test-table": [put]},
+        )
+        mock_sleep.assert_called_once()
+
+    @patch("client_map.time.sleep")
+    def test_flush_unprocessed_items_stay_buffered(self, mock_sleep):
+        """Test that items DynamoDB never processes are kept for the next flush."""
+        put1 = {"PutRequest": {"Item": {"client_id": "client1", "lang": "es"}}}
+        put2 = {"PutRequest": {"Item": {"client_id": "client2", "lang": "fr"}}}
+        self.mock_batch_write.return_value = {
+            "UnprocessedItems": {"test-table": [put2]}
+        }
+
+        self.client_map.add_client("client1", "es")
+        self.client_map.add_client("client2", "fr")
+        with self.assertRaises(ClientError):
+            self.client_map.flush()
+
+        self.assertEqual(self.mock_batch_write.call_count, BATCH_MAX_RETRIES + 1)
+        self.assertEqual(
+            self.mock_batch_write.call_args_list[0][1]["RequestItems"],
+            {"test-table": [put1, put2]},
+        )
+
+        # Only the unprocessed put is retried on the next flush
+        self.mock_batch_write.reset_mock()
+        self.mock_batch_write.return_value = {"UnprocessedItems": {}}
+        self.client_map.flush()
+
+        self.mock_batch_write.assert_called_once_with(
+            RequestItems={"test-table": [put2]}
+        )
+
+    def test_flush_error_keeps_writes_buffered(self):
+        """Test that a failed flush leaves the batch buffered for retry."""
+        self.mock_batch_write.side_effect = ClientError(
+            {"Error": {"Code": "ProvisionedThroughputExceededException"}},
+            "BatchWriteItem",
+        )
+
+        self.client_map.add_client("client1", "es")
+        with self.assertRaises(ClientError):
+            self.client_map.flush()
+
+        self.mock_batch_write.side_effect = None
+        self.mock_batch_write.return_value = {"UnprocessedItems": {}}
+        self.client_map.flush()
+
+        self.assertEqual(self.mock_batch_write.call_count, 2)
 
     def test_get_client_from_local_cache(self):
         """Test getting a client from local cache."""
@@ -176,25 +463,151 @@ class TestTranslationClientMapDynamoDB(unittest.TestCase):
 
         client = self.client_map.get_client("client1")
         self.assertIsNotNone(client)
-        self.assertEqual(client["lang"], "es")
-        self.assertEqual(client["ws"], ws_mock)
+        self.assertEqual(client.lang, "es")
+        self.assertEqual(client.ws, ws_mock)
 
         # DynamoDB get_item should not have been called
         self.mock_table.get_item.assert_not_called()
 
-    def test_get_client_from_dynamodb(self):
-        """Test getting a client from DynamoDB when not in local cache."""
-        self.mock_table.get_item.return_value = {
-            "Item": {"client_id": "client1", "lang": "es"}
+    def test_get_client_does_not_query_dynamodb(self):
+        """Test that a local cache miss does not fall back to DynamoDB."""
+        client = self.client_map.get_client("client1")
+
+        self.assertIsNone(client)
+        self.mock_table.get_item.assert_not_called()
+
+    @patch("client_map.time.sleep")
+    def test_get_clients_bulk(self, mock_sleep):
+        """Test resolving cache misses with BatchGetItem."""
+        ws_mock = Mock()
+        self.client_map.add_client("local", "de", ws_mock)
+        mock_batch_get = self.mock_dynamodb.meta.client.batch_get_item
+        mock_batch_get.side_effect = [
+            {
+                "Responses": {"test-table": [{"client_id": "remote1", "lang": "es"}]},
+                "UnprocessedKeys": {"test-table": {"Keys": [{"client_id": "remote2"}]}},
+            },
+            {
+                "Responses": {"test-table": [{"client_id": "remote2", "lang": "fr"}]},
+                "UnprocessedKeys": {},
+            },
+        ]
+
+        clients = self.client_map.get_clients_bulk(
+            ["local", "remote1", "remote2", "remote1", "gone"]
+        )
+
+        self.assertEqual(set(clients), {"local", "remote1", "remote2"})
+        self.assertIs(clients["local"].ws, ws_mock)
+        self.assertEqual(clients["remote2"].lang, "fr")
+
+        # Only cache misses are requested, without duplicates
+        first_keys = mock_batch_get.call_args_list[0][1]["RequestItems"]["test-table"]
+        self.assertEqual(
+            first_keys["Keys"],
+            [{"client_id": "remote1"}, {"client_id": "remote2"}, {"client_id": "gone"}],
+        )
+        mock_sleep.assert_called_once()
+
+        # Resolved clients are now cached locally
+        self.assertEqual(self.client_map.get_client("remote1").lang, "es")
+
+    def test_get_clients_bulk_chunks_keys(self):
+        """Test that BatchGetItem requests are limited to 100 keys."""
+        mock_batch_get = self.mock_dynamodb.meta.client.batch_get_item
+        mock_batch_get.return_value = {"Responses": {}, "UnprocessedKeys": {}}
+
+        self.client_map.get_clients_bulk([f"client{i}" for i in range(150)])
+
+        key_counts = [
+            len(c[1]["RequestItems"]["test-table"]["Keys"])
+            for c in mock_batch_get.call_args_list
+        ]
+        self.assertEqual(key_counts, [100, 50])
+
+    def test_refresh(self):
+        """Test resyncing the local cache with the clients stored in DynamoDB."""
+        ws_mock = Mock()
+        self.client_map.add_client("client1", "de", ws_mock)
+        self.mock_table.scan.return_value = {
+            "Items": [
+                {"client_id": "client1", "lang": "de"},
+                {"client_id": "stale", "lang": "es"},
+            ]
         }
+        self.client_map.refresh()
+        self.mock_table.scan.return_value = None
+        self.mock_table.scan.side_effect = [
+            {
+                "Items": [{"client_id": "client1", "lang": "fr"}],
+                "LastEvaluatedKey": {"client_id": "client1"},
+            },
+            {"Items": [{"client_id": "client2", "lang": "es"}]},
+        ]
+
+        # Another instance deleted "stale" and changed client1's language
+        count = self.client_map.refresh()
+
+        self.assertEqual(count, 2)
+        self.assertFalse(self.client_map.exists("stale"))
+        self.assertIs(self.client_map.get_client("client1").ws, ws_mock)
+        self.assertEqual(
+            self.client_map.get_clients_by_language(),
+            {"fr": ("client1",), "es": ("client2",)},
+        )
+        for scan_call in self.mock_table.scan.call_args_list:
+            self.assertTrue(scan_call[1]["ConsistentRead"])
+
+    def test_refresh_keeps_clients_written_locally(self):
+        """Test that a scan can't undo writes made since the last refresh."""
+        self.mock_table.scan.return_value = {
+            "Items": [
+                {"client_id": "client1", "lang": "es"},
+                {"client_id": "gone", "lang": "es"},
+            ]
+        }
+        self.client_map.refresh()
 
-        client = self.client_map.get_client("client1")
-        self.assertIsNotNone(client)
-        self.assertEqual(client["lang"], "es")
-        self.assertIsNone(client["ws"])  # WebSocket not stored in DynamoDB
+        # Written here after the last refresh; the scan still has old state
+        self.client_map.add_client("new", "de")
+        self.client_map.update_language("client1", "fr")
+        self.client_map.delete_client("gone")
+        self.client_map.refresh()
+
+        self.assertEqual(
+            self.client_map.get_clients_by_language(),
+            {"de": ("new",), "fr": ("client1",)},
+        )
+
+        # Once refreshed, later scans are authoritative again
+        self.client_map.refresh()
+        self.assertEqual(
+            self.client_map.get_clients_by_language(),
+            {"es": ("client1", "gone")},
+        )
+
+    def test_refresh_max_age(self):
+        """Test that a recent refresh is reused instead of scanning again."""
+        self.mock_table.scan.return_value = {"Items": []}
+
+        self.client_map.refresh(max_age=60)
+        self.client_map.refresh(max_age=60)
+        self.assertEqual(self.mock_table.scan.call_count, 1)
+
+        self.client_map.refresh(max_age=0)
+        self.assertEqual(self.mock_table.scan.call_count, 2)
 
-        # Verify DynamoDB was queried
-        self.mock_table.get_item.assert_called_once_with(Key={"client_id": "client1"})
+    def test_refresh_flushes_and_keeps_cache_on_error(self):
+        """Test that refresh writes buffered changes and survives scan errors."""
+        self.client_map.add_client("client1", "es")
+        self.mock_table.scan.side_effect = ClientError(
+            {"Error": {"Code": "ProvisionedThroughputExceededException"}}, "Scan"
+        )
+
+        self.assertEqual(self.client_map.refresh(), 1)
+
+        self.mock_batch_write.assert_called_once()
+        self.assertTrue(self.client_map.exists("client1"))
 
     def test_update_language(self):
         """Test updating a client's language in DynamoDB."""
@@ -203,16 +616,62 @@ class TestTranslationClientMapDynamoDB(unittest.TestCase):
 
         result = self.client_map.update_language("client1", "fr")
         self.assertTrue(result)
-
-        # Verify DynamoDB was updated
-        self.mock_table.update_item.assert_called_once()
-        call_args = self.mock_table.update_item.call_args
-        self.assertEqual(call_args[1]["Key"], {"client_id": "client1"})
-        self.assertEqual(call_args[1]["ExpressionAttributeValues"], {":lang": "fr"})
+        self.client_map.flush()
+
+        # Verify the put and the update coalesced into one write
+        self.mock_batch_write.assert_called_once_with(
+            RequestItems={
+                "test-table": [
+                    {"PutRequest": {"Item": {"client_id": "client1", "lang": "fr"}}}
+                ]
+            }
+        )
+        self.mock_table.update_item.assert_not_called()
 
         # Verify local cache was updated
         client = self.client_map.get_client("client1")
-        self.assertEqual(client["lang"], "fr")
+        self.assertEqual(client.lang, "fr")
+
+    def test_get_clients_by_language(self):
+        """Test that clients loaded from DynamoDB are indexed by language."""
+        self.mock_table.scan.return_value = {
+            "Items": [{"client_id": "remote1", "lang": "fr"}]
+        }
+        self.client_map.refresh()
+        self.client_map.add_client("client1", "es", Mock())
+        self.client_map.update_language("remote1", "es")
+
+        self.assertEqual(
+            self.client_map.get_clients_by_language(),
+            {"es": ("client1", "remote1")},
+        )
+
+    def test_writes_stay_buffered_without_background_flush(self):
+        """Test that no flusher thread is started unless enabled."""
+        self.client_map.add_client("client1", "es")
+
+        self.assertIsNone(self.client_map._flusher)
+        self.mock_batch_write.assert_not_called()
+
+        with patch("client_map.boto3.resource", return_value=self.mock_dynamodb):
+            background = TranslationClientMapDynamoDB(
+                "test-table", flush_interval=3600, background_flush=True
+            )
+        background.add_client("client2", "fr")
+
+        self.assertTrue(background._flusher.is_alive())
+
+    def test_drain_flushes_buffered_writes(self):
+        """Test that the exit hook writes anything still buffered."""
+        self.client_map.add_client("client1", "es")
+        self.client_map._drain()
+
+        self.mock_batch_write.assert_called_once()
+        self.mock_batch_write.reset_mock()
+
+        # Nothing buffered, nothing written
+        self.client_map._drain()
+        self.mock_batch_write.assert_not_called()
 
     def test_count(self):
         """Test counting clients (local cache only)."""
@@ -4,6 +4,14 @@ Integration tests for the refactored server.
 Tests WebSocket functionality with the new modules.
 """
 
+import gzip
+import json
+import os
+import queue
+import shutil
+import tempfile
+import threading
+import time
 import unittest
 from unittest.mock import Mock, patch
 
@@ -11,15 +19,21 @@ from unittest.mock import Mock, patch
 class TestServerIntegration(unittest.TestCase):
     """Integration tests for the Flask server."""
 
+    @classmethod
+    def setUpClass(cls):
+        """Import the server once for the whole test case."""
+        # Imported here rather than at module level to avoid interfering
+        # with other tests
+        import server
+
+        cls.server = server
+        cls.app = server.app
+        cls.client_map = server.client_map
+        cls.message_handler = server.message_handler
+        cls.app.config["TESTING"] = True
+
     def setUp(self):
         """Set up test fixtures."""
-        # Import server modules here to avoid interfering with other tests
-        from server import app, client_map, message_handler
-
-        self.app = app
-        self.client_map = client_map
-        self.message_handler = message_handler
-        self.app.config["TESTING"] = True
         self.client = self.app.test_client()
 
     def test_health_endpoint(self):
@@ -31,6 +45,8 @@ class TestServerIntegration(unittest.TestCase):
         self.assertIn("aws_translate", data)
         self.assertIn("connected_clients", data)
         self.assertEqual(data["status"], "healthy")
+        self.assertEqual(data["connected_clients"], self.client_map.count())
+        self.assertIsInstance(data["aws_translate"], bool)
 
     def test_index_endpoint(self):
         """Test the index endpoint returns HTML."""
@@ -39,6 +55,227 @@ class TestServerIntegration(unittest.TestCase):
         self.assertEqual(response.content_type, "text/html; charset=utf-8")
         self.assertGreater(len(response.data), 0)
 
+    def test_static_cache_headers(self):
+        """Test static assets are cacheable and revalidate with an ETag."""
+        response = self.client.get("/main.css")
+        self.addCleanup(response.close)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("max-age=3600", response.headers["Cache-Control"])
+        self.assertIn("ETag", response.headers)
+
+    def _temp_static_folder(self):
+        """Serve static files from a temporary copy holding main.css."""
+        static_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(static_dir.cleanup)
+        shutil.copy2(os.path.join(self.app.static_folder, "main.css"), static_dir.name)
+
+        original = self.app.static_folder
+        self.app.static_folder = static_dir.name
+        self.addCleanup(setattr, self.app, "static_folder", original)
+        return static_dir.name
+
+    def _write_gzip_variant(self, static_dir):
+        """Write main.css.gz next to main.css and return its contents."""
+        with open(os.path.join(static_dir, "main.css"), "rb") as f:
+            compressed = gzip.compress(f.read())
+        with open(os.path.join(static_dir, "main.css.gz"), "wb") as f:
+            f.write(compressed)
+        return compressed
+
+    def test_static_precompressed_variant(self):
+        """Test a .gz variant is served to clients that accept gzip."""
+        compressed = self._write_gzip_variant(self._temp_static_folder())
+
+        response = self.client.get("/main.css", headers={"Accept-Encoding": "gzip"})
+        self.addCleanup(response.close)
+        self.assertEqual(response.headers["Content-Encoding"], "gzip")
+        self.assertTrue(response.content_type.startswith("text/css"))
+        self.assertIn("Accept-Encoding", response.headers["Vary"])
+        self.assertEqual(response.data, compressed)
+
+        plain = self.client.get("/main.css")
+        self.addCleanup(plain.close)
+        self.assertNotIn("Content-Encoding", plain.headers)
+
+        # An encoding with quality 0 is refused
+        refused = self.client.get(
+            "/main.css", headers={"Accept-Encoding": "gzip;q=0, identity"}
+        )
+        self.addCleanup(refused.close)
+        self.assertNotIn("Content-Encoding", refused.headers)
+
+    def test_static_stale_precompressed_variant_ignored(self):
+        """Test a .gz variant older than its source file is not served."""
+        static_dir = self._temp_static_folder()
+        self._write_gzip_variant(static_dir)
+        # Source edited after the variant was built
+        mtime = os.stat(os.path.join(static_dir, "main.css.gz")).st_mtime + 10
+        os.utime(os.path.join(static_dir, "main.css"), (mtime, mtime))
+
+        response = self.client.get("/main.css", headers={"Accept-Encoding": "gzip"})
+        self.addCleanup(response.close)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("Content-Encoding", response.headers)
+
+    def test_broadcast_message_removes_failed_clients(self):
+        """Test that broadcast sends to every client and drops failed ones."""
+        ok_ws = Mock()
+        bad_ws = Mock()
+        bad_ws.send.side_effect = ConnectionError("closed")
+        excluded_ws = Mock()
+        senders = {
+            "bcast_ok": self.server.ClientSender(ok_ws, "bcast_ok"),
+            "bcast_bad": self.server.ClientSender(bad_ws, "bcast_bad"),
+            "bcast_excluded": self.server.ClientSender(excluded_ws, "bcast_excl"),
+        }
+        for client_id, sender in senders.items():
+            self.client_map.add_client(client_id, "en", sender)
+        self.addCleanup(self.client_map.delete_clients_bulk, list(senders))
+
+        self.server.broadcast_message(
+            "connection_status", {}, exclude_client="bcast_excluded"
+        )
+        for sender in senders.values():
+            sender.close()
+            sender._thread.join(timeout=5)
+
+        ok_ws.send.assert_called_once()
+        excluded_ws.send.assert_not_called()
+        self.assertTrue(self.client_map.exists("bcast_ok"))
+        self.assertFalse(self.client_map.exists("bcast_bad"))
+
+    def test_client_sender_drops_oldest_when_full(self):
+        """Test that a stalled client's queue keeps only the newest frames."""
+        release = threading.Event()
+        sent = []
+        ws = Mock()
+        ws.send.side_effect = lambda frame: release.wait(5) and sent.append(frame)
+
+        sender = self.server.ClientSender(ws, "slow_client", maxsize=2)
+        sender.send("first")  # Picked up by the sender thread, which blocks
+        while ws.send.call_count == 0:
+            time.sleep(0.001)
+        for frame in ("a", "b", "c", "d"):
+            sender.send(frame)
+        sender.close()
+        release.set()
+        sender._thread.join(timeout=5)
+
+        self.assertEqual(sent, ["first", "d"])
+
+    def test_client_sender_batches_queued_frames(self):
+        """Test that frames queued behind a send go out as one JSON array."""
+        release = threading.Event()
+        sent = []
+        ws = Mock()
+        ws.send.side_effect = lambda frame: release.wait(5) and sent.append(frame)
+
+        sender = self.server.ClientSender(ws, "batch_client", batch=True, flush_ms=0)
+        sender.send(b'{"n": 1}')
+        while ws.send.call_count == 0:
+            time.sleep(0.001)
+        sender.send(b'{"n": 2}')
+        sender.send(b'{"n": 3}')
+        sender.close()
+        release.set()
+        sender._thread.join(timeout=5)
+
+        self.assertEqual(len(sent), 2)
+        self.assertEqual(json.loads(sent[1]), [{"n": 2}, {"n": 3}])
+
+    def test_client_sender_bad_batch_frame_closes_sender(self):
+        """Test that a frame that can't be joined closes the sender cleanly."""
+        release = threading.Event()
+        ws = Mock()
+        ws.send.side_effect = lambda frame: release.wait(5)
+        sender = self.server.ClientSender(ws, "batch_bad", batch=True, flush_ms=0)
+        self.client_map.add_client("batch_bad", "en", sender)
+        self.addCleanup(self.client_map.delete_client, "batch_bad")
+
+        sender.send(b'{"n": 1}')
+        while ws.send.call_count == 0:
+            time.sleep(0.001)
+        sender.send(b'{"n": 2}')
+        sender.send('{"n": 3}')  # str from a legacy caller can't join bytes
+        release.set()
+        sender._thread.join(timeout=5)
+
+        self.assertFalse(sender._thread.is_alive())
+        self.assertEqual(ws.send.call_count, 1)
+        self.assertTrue(sender._closed)
+        self.assertFalse(self.client_map.exists("batch_bad"))
+
+    def test_client_sender_close_survives_later_sends(self):
+        """Test that frames sent after close() can't evict the stop sentinel."""
+        release = threading.Event()
+        ws = Mock()
+        ws.send.side_effect = lambda payload: release.wait(5)
+        sender = self.server.ClientSender(ws, "sender_close", maxsize=2)
+
+        sender.send("first")  # Taken by the thread, which blocks in ws.send
+        time.sleep(0.05)
+        sender.send("second")
+        sender.close()
+        for n in range(5):
+            sender.send(f"late{n}")
+
+        release.set()
+        sender._thread.join(timeout=5)
+
+        self.assertFalse(sender._thread.is_alive())
+        sent = [c[0][0] for c in ws.send.call_args_list]
+        self.assertEqual(sent, ["first", "second"])
+
+    def test_client_sender_removes_failed_client(self):
+        """Test that a failed send removes the client and stops the sender."""
+        ws = Mock()
+        ws.send.side_effect = ConnectionError("closed")
+        sender = self.server.ClientSender(ws, "sender_bad")
+        self.client_map.add_client("sender_bad", "en", sender)
+        self.addCleanup(self.client_map.delete_client, "sender_bad")
+
+        sender.send("frame")
+        sender._thread.join(timeout=5)
+
+        self.assertFalse(sender._thread.is_alive())
+        self.assertFalse(self.client_map.exists("sender_bad"))
+
+    def test_new_text_broadcast_runs_off_receive_loop(self):
+        """Test that new_text is queued and broadcast by the worker."""
+        done = threading.Event()
+        with patch(
+            "server._broadcast_new_text", side_effect=lambda *a: done.set()
+        ) as mock_broadcast:
+            self.server._do_new_text("ws", "sender", {"text": "Hello"})
+            self.assertTrue(done.wait(5))
+
+        mock_broadcast.assert_called_once_with("ws", "sender", {"text": "Hello"})
+
+    def test_new_text_rejected_before_queueing(self):
+        """Test that unauthorized or overflowing new_text is never queued."""
+        ws = Mock()
+        with patch.object(self.message_handler, "validate_api_key", return_value=False):
+            self.server._do_new_text(ws, "sender", {"text": "Hello"})
+
+        self.assertTrue(self.server._broadcast_queue.empty())
+        self.assertEqual(json.loads(ws.send.call_args[0][0])["type"], "error")
+
+        # A full queue rejects new text instead of growing
+        ws.reset_mock()
+        full_queue = Mock()
+        full_queue.put_nowait.side_effect = queue.Full
+        with (
+            patch.object(self.message_handler, "validate_api_key", return_value=True),
+            patch.object(self.server, "_broadcast_queue", full_queue),
+        ):
+            self.server._do_new_text(ws, "sender", {"text": "Hello"})
+
+        full_queue.put_nowait.assert_called_once()
+
+        self.assertEqual(json.loads(ws.send.call_args[0][0])["type"], "error")
+
     def test_client_map_integration(self):
         """Test that the global client_map works correctly."""
         # Initial count should be 0
@@ -52,13 +289,13 @@ class TestServerIntegration(unittest.TestCase):
         # Get the client
         client = self.client_map.get_client("test_client")
         self.assertIsNotNone(client)
-        self.assertEqual(client["lang"], "es")
+        self.assertEqual(client.lang, "es")
 
         # Update language
         result = self.client_map.update_language("test_client", "fr")
         self.assertTrue(result)
         client = self.client_map.get_client("test_client")
-        self.assertEqual(client["lang"], "fr")
+        self.assertEqual(client.lang, "fr")
 
         # Delete the client
         self.client_map.delete_client("test_client")
@@ -76,6 +313,14 @@ class TestServerIntegration(unittest.TestCase):
         self.assertEqual(error_msg["type"], "error")
         self.assertEqual(error_msg["data"]["message"], "Test error")
 
+    def test_connection_status_frame(self):
+        """Test that the precomputed greeting matches the status message."""
+        self.assertIsInstance(self.server.CONNECTION_STATUS_FRAME, bytes)
+        self.assertEqual(
+            json.loads(self.server.CONNECTION_STATUS_FRAME),
+            self.message_handler.create_connection_status_message(),
+        )
+
     def test_message_handler_with_client_map(self):
         """Test message handler interacting with client map."""
         # Set up test clients
@@ -93,7 +338,7 @@ class TestServerIntegration(unittest.TestCase):
 
         # Verify the language was updated
         client = self.client_map.get_client("client1")
-        self.assertEqual(client["lang"], "de")
+        self.assertEqual(client.lang, "de")
 
         # Clean up
         self.client_map.delete_client("client1")
@@ -117,26 +362,23 @@ class TestServerIntegration(unittest.TestCase):
             self.client_map.add_client("client1", "en", ws1)
             self.client_map.add_client("client2", "es", ws2)
 
-            # Simulate new text with no API key required (handler has None key)
             result = real_handler.handle_new_text(
-                "Hello world", "2024-01-01T00:00:00", "", self.client_map
+                "Hello world", "2024-01-01T00:00:00", self.client_map
             )
 
             # Verify result
             self.assertEqual(result["status"], "success")
-            self.assertEqual(len(result["translations"]), 2)
+            self.assertEqual(len(result["payloads"]), 2)
 
             # English client should get original text
-            en_translation = next(
-                t for t in result["translations"] if t["client_id"] == "client1"
-            )
-            self.assertEqual(en_translation["translation"]["text"], "Hello world")
+            en_payload, en_clients = result["payloads"]["en"]
+            self.assertIn("client1", en_clients)
+            self.assertEqual(json.loads(en_payload)["data"]["text"], "Hello world")
 
             # Spanish client should get translated text
-            es_translation = next(
-                t for t in result["translations"] if t["client_id"] == "client2"
-            )
-            self.assertEqual(es_translation["translation"]["text"], "Hola mundo")
+            es_payload, es_clients = result["payloads"]["es"]
+            self.assertIn("client2", es_clients)
+            self.assertEqual(json.loads(es_payload)["data"]["text"], "Hola mundo")
 
             # Clean up
             self.client_map.delete_client("client1")
@@ -5,7 +5,7 @@ Unit tests for Lambda WebSocket handler.
 
 import json
 import unittest
-from unittest.mock import MagicMock, patch, call
+from unittest.mock import MagicMock, Mock, patch, call
 import os
 import sys
 
@@ -18,20 +18,32 @@ class TestLambdaHandler(unittest.TestCase):
 
     def setUp(self):
         """Set up test fixtures."""
-        # Set environment variables
-        os.environ["DYNAMODB_TABLE_NAME"] = "test-connections"
-        os.environ["AWS_REGION"] = "us-east-1"
-        os.environ["API_KEY"] = "test-api-key-123"
+        # Set environment variables, restored after each test
+        env = patch.dict(
+            os.environ,
+            {
+                "DYNAMODB_TABLE_NAME": "test-connections",
+                "AWS_REGION": "us-east-1",
+                "API_KEY": "test-api-key-123",
+            },
+        )
+        env.start()
+        self.addCleanup(env.stop)
 
         # Import lambda_handler after setting env vars
         import lambda_handler
 
         self.lambda_handler = lambda_handler
 
-        # Create a fresh client map for each test
+        # Use a fresh in-memory client map for each test
         from client_map import TranslationClientMap
 
-        self.lambda_handler.client_map = TranslationClientMap()
+        self.client_map = TranslationClientMap()
+        patcher = patch.object(
+            lambda_handler, "_client_map", return_value=self.client_map
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
 
     def test_handle_connect(self):
         """Test handling WebSocket connect event."""
@@ -49,14 +61,48 @@ class TestLambdaHandler(unittest.TestCase):
         self.assertEqual(response["body"], "Connected")
 
         # Verify client was added to map
-        client = self.lambda_handler.client_map.get_client("test-connection-123")
+        client = self.client_map.get_client("test-connection-123")
         self.assertIsNotNone(client)
-        self.assertEqual(client["lang"], "en")
+        self.assertEqual(client.lang, "en")
+
+    def test_handle_connect_failed_flush_leaves_no_record(self):
+        """Test that a rejected connection is neither cached nor stored."""
+        from botocore.exceptions import ClientError
+
+        client_map, mock_dynamodb = self._dynamodb_client_map()
+        mock_batch_write = mock_dynamodb.meta.client.batch_write_item
+        mock_batch_write.side_effect = [
+            ClientError(
+                {"Error": {"Code": "ProvisionedThroughputExceededException"}},
+                "BatchWriteItem",
+            ),
+            {"UnprocessedItems": {}},
+        ]
+        event = {
+            "requestContext": {
+                "connectionId": "test-connection-123",
+                "routeKey": "$connect",
+            }
+        }
+
+        response = self.lambda_handler.lambda_handler(event, {})
+
+        self.assertEqual(response["statusCode"], 500)
+        self.assertFalse(client_map.exists("test-connection-123"))
+        # The retry at the end of the invocation writes only the delete
+        self.assertEqual(
+            mock_batch_write.call_args[1]["RequestItems"],
+            {
+                "test-connections": [
+                    {"DeleteRequest": {"Key": {"client_id": "test-connection-123"}}}
+                ]
+            },
+        )
 
     def test_handle_disconnect(self):
         """Test handling WebSocket disconnect event."""
         # First add a client
-        self.lambda_handler.client_map.add_client("test-connection-123", language="en")
+        self.client_map.add_client("test-connection-123", language="en")
 
         event = {
             "requestContext": {
@@ -72,16 +118,16 @@ class TestLambdaHandler(unittest.TestCase):
         self.assertEqual(response["body"], "Disconnected")
 
         # Verify client was removed from map
-        client = self.lambda_handler.client_map.get_client("test-connection-123")
+        client = self.client_map.get_client("test-connection-123")
         self.assertIsNone(client)
 
     @patch("lambda_handler.get_apigw_management_client")
     def test_handle_message_set_language(self, mock_get_client):
         """Test handling set_language message."""
         # Add client first
-        self.lambda_handler.client_map.add_client("test-connection-123", language="en")
+        self.client_map.add_client("test-connection-123", language="en")
 
-        mock_apigw = MagicMock()
+        mock_apigw = Mock()
         mock_get_client.return_value = mock_apigw
 
         event = {
@@ -100,8 +146,8 @@ class TestLambdaHandler(unittest.TestCase):
         self.assertEqual(response["statusCode"], 200)
 
         # Verify language was updated
-        client = self.lambda_handler.client_map.get_client("test-connection-123")
-        self.assertEqual(client["lang"], "es")
+        client = self.client_map.get_client("test-connection-123")
+        self.assertEqual(client.lang, "es")
 
         # Verify messages were sent
         self.assertTrue(mock_apigw.post_to_connection.called)
@@ -109,7 +155,7 @@ class TestLambdaHandler(unittest.TestCase):
     @patch("lambda_handler.get_apigw_management_client")
     def test_handle_message_new_text_unauthorized(self, mock_get_client):
         """Test handling new_text message with invalid API key."""
-        mock_apigw = MagicMock()
+        mock_apigw = Mock()
         mock_get_client.return_value = mock_apigw
 
         event = {
@@ -141,9 +187,9 @@ class TestLambdaHandler(unittest.TestCase):
     def test_handle_message_new_text_authorized(self, mock_get_client):
         """Test handling new_text message with valid API key."""
         # Add a client
-        self.lambda_handler.client_map.add_client("test-connection-123", language="en")
+        self.client_map.add_client("test-connection-123", language="en")
 
-        mock_apigw = MagicMock()
+        mock_apigw = Mock()
         mock_get_client.return_value = mock_apigw
 
         event = {
@@ -179,56 +225,34 @@ class TestLambdaHandler(unittest.TestCase):
         sent_to_connections = [call[1]["ConnectionId"] for call in calls]
         self.assertIn("test-connection-123", sent_to_connections)
 
-    def test_lambda_handler_connect_route(self):
-        """Test main lambda_handler with $connect route."""
-        event = {
-            "requestContext": {
-                "connectionId": "test-connection-123",
-                "routeKey": "$connect",
-            }
-        }
-        context = {}
-
-        response = self.lambda_handler.lambda_handler(event, context)
-
-        self.assertEqual(response["statusCode"], 200)
-
-    def test_lambda_handler_disconnect_route(self):
-        """Test main lambda_handler with $disconnect route."""
-        # Add client first
-        self.lambda_handler.client_map.add_client("test-connection-123", language="en")
-
-        event = {
-            "requestContext": {
-                "connectionId": "test-connection-123",
-                "routeKey": "$disconnect",
-            }
-        }
-        context = {}
-
-        response = self.lambda_handler.lambda_handler(event, context)
-
-        self.assertEqual(response["statusCode"], 200)
-
-    def test_lambda_handler_unknown_route(self):
-        """Test main lambda_handler with unknown route."""
-        event = {
-            "requestContext": {
-                "connectionId": "test-connection-123",
-                "routeKey": "$unknown",
-            }
-        }
-        context = {}
+    def test_lambda_handler_routes(self):
+        """Test that the main lambda_handler dispatches on the route key."""
+        cases = [
+            ("$connect", 200),
+            ("$disconnect", 200),
+            ("$unknown", 400),
+        ]
+        for route_key, expected_status in cases:
+            with self.subTest(route_key=route_key):
+                # Disconnect needs an existing client
+                self.client_map.add_client("test-connection-123", language="en")
+                event = {
+                    "requestContext": {
+                        "connectionId": "test-connection-123",
+                        "routeKey": route_key,
+                    }
+                }
 
-        response = self.lambda_handler.lambda_handler(event, context)
+                response = self.lambda_handler.lambda_handler(event, {})
 
-        self.assertEqual(response["statusCode"], 400)
-        self.assertIn("Unknown route", response["body"])
+                self.assertEqual(response["statusCode"], expected_status)
+                if expected_status == 400:
+                    self.assertIn("Unknown route", response["body"])
 
     @patch("lambda_handler.get_apigw_management_client")
     def test_send_message_to_connection_success(self, mock_get_client):
         """Test successfully sending message to a connection."""
-        mock_apigw = MagicMock()
+        mock_apigw = Mock()
         mock_get_client.return_value = mock_apigw
 
         message = {"type": "test", "data": {"foo": "bar"}}
@@ -239,19 +263,33 @@ class TestLambdaHandler(unittest.TestCase):
         self.assertTrue(result)
         mock_apigw.post_to_connection.assert_called_once()
 
+    def test_send_message_to_connection_pre_encoded(self):
+        """Test that pre-encoded payloads are sent unchanged."""
+        mock_apigw = Mock()
+        payload = b'{"type": "test", "data": {}}'
+
+        result = self.lambda_handler.send_message_to_connection(
+            "test-connection-123", payload, mock_apigw
+        )
+
+        self.assertTrue(result)
+        mock_apigw.post_to_connection.assert_called_once_with(
+            ConnectionId="test-connection-123", Data=payload
+        )
+
     @patch("lambda_handler.get_apigw_management_client")
     def test_send_message_to_connection_gone(self, mock_get_client):
         """Test sending message to gone connection (410 error)."""
         from botocore.exceptions import ClientError
 
-        mock_apigw = MagicMock()
+        mock_apigw = Mock()
         mock_apigw.post_to_connection.side_effect = ClientError(
             {"Error": {"Code": "GoneException"}}, "post_to_connection"
         )
         mock_get_client.return_value = mock_apigw
 
         # Add client first
-        self.lambda_handler.client_map.add_client("test-connection-123", language="en")
+        self.client_map.add_client("test-connection-123", language="en")
 
         message = {"type": "test", "data": {"foo": "bar"}}
         result = self.lambda_handler.send_message_to_connection(
@@ -260,9 +298,207 @@ class TestLambdaHandler(unittest.TestCase):
 
         self.assertFalse(result)
 
-        # Verify client was removed from map
-        client = self.lambda_handler.client_map.get_client("test-connection-123")
-        self.assertIsNone(client)
+        # Removal is left to the caller or the connection's $disconnect
+        self.assertTrue(self.client_map.exists("test-connection-123"))
+
+    def test_broadcast_message(self):
+        """Test broadcasting to all clients except the excluded one."""
+        from botocore.exceptions import ClientError
+
+        for connection_id in ["conn-1", "conn-2", "conn-3"]:
+            self.client_map.add_client(connection_id, language="en")
+
+        def post_to_connection(ConnectionId, Data):
+            if ConnectionId == "conn-3":
+                raise ClientError(
+                    {"Error": {"Code": "GoneException"}}, "post_to_connection"
+                )
+
+        mock_apigw = Mock()
+        mock_apigw.post_to_connection.side_effect = post_to_connection
+
+        message = {"type": "test", "data": {"foo": "bar"}}
+        self.lambda_handler.broadcast_message(
+            message, mock_apigw, exclude_connection="conn-1"
+        )
+
+        calls = mock_apigw.post_to_connection.call_args_list
+        sent_to = sorted(c[1]["ConnectionId"] for c in calls)
+        self.assertEqual(sent_to, ["conn-2", "conn-3"])
+
+        # Payload is encoded once and shared by every send
+        payloads = [c[1]["Data"] for c in calls]
+        self.assertEqual(json.loads(payloads[0]), message)
+        self.assertIs(payloads[0], payloads[1])
+
+        # Gone connection is cleaned up, the others remain
+        self.assertTrue(self.client_map.exists("conn-1"))
+        self.assertTrue(self.client_map.exists("conn-2"))
+        self.assertFalse(self.client_map.exists("conn-3"))
+
+    @patch("lambda_handler.get_apigw_management_client")
+    def test_lambda_handler_flushes_client_map(self, mock_get_client):
+        """Test that buffered client map writes are flushed before returning."""
+        mock_get_client.return_value = Mock()
+        event = {
+            "requestContext": {
+                "connectionId": "test-connection-123",
+                "routeKey": "$default",
+                "domainName": "test.execute-api.us-east-1.amazonaws.com",
+            },
+            "body": json.dumps({"type": "unknown"}),
+        }
+
+        with patch.object(self.client_map, "flush") as mock_flush:
+            self.lambda_handler.lambda_handler(event, {})
+
+        mock_flush.assert_called_once()
+
+    def _dynamodb_client_map(self):
+        """Build a DynamoDB client map backed by a mock table."""
+        from client_map import TranslationClientMapDynamoDB
+
+        mock_dynamodb = Mock()
+        mock_dynamodb.meta.client.batch_write_item.return_value = {
+            "UnprocessedItems": {}
+        }
+        with patch("client_map.boto3.resource", return_value=mock_dynamodb):
+            client_map = TranslationClientMapDynamoDB("test-connections")
+
+        patcher = patch.object(
+            self.lambda_handler, "_client_map", return_value=client_map
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return client_map, mock_dynamodb
+
+    def test_broadcast_message_deletes_gone_connections_in_one_batch(self):
+        """Test that every failed connection is deleted in one BatchWriteItem."""
+        from botocore.exceptions import ClientError
+
+        client_map, mock_dynamodb = self._dynamodb_client_map()
+        mock_batch_write = mock_dynamodb.meta.client.batch_write_item
+        mock_dynamodb.Table.return_value.scan.return_value = {
+            "Items": [
+                {"client_id": connection_id, "lang": "en"}
+                for connection_id in ["conn-1", "conn-2", "conn-3"]
+            ]
+        }
+
+        def post_to_connection(ConnectionId, Data):
+            if ConnectionId != "conn-1":
+                raise ClientError(
+                    {"Error": {"Code": "GoneException"}}, "post_to_connection"
+                )
+
+        mock_apigw = Mock()
+        mock_apigw.post_to_connection.side_effect = post_to_connection
+
+        self.lambda_handler.broadcast_message({"type": "test"}, mock_apigw)
+
+        mock_batch_write.assert_called_once()
+        requests = mock_batch_write.call_args[1]["RequestItems"]["test-connections"]
+        self.assertEqual(
+            sorted(r["DeleteRequest"]["Key"]["client_id"] for r in requests),
+            ["conn-2", "conn-3"],
+        )
+        self.assertEqual(client_map.count(), 1)
+
+    @patch("lambda_handler.get_apigw_management_client")
+    def test_set_language_for_client_connected_elsewhere(self, mock_get_client):
+        """Test set_language on a container that did not handle $connect."""
+        mock_apigw = Mock()
+        mock_get_client.return_value = mock_apigw
+        client_map, mock_dynamodb = self._dynamodb_client_map()
+        mock_batch_write = mock_dynamodb.meta.client.batch_write_item
+
+        # Not cached here, and the lookup does not fall back to DynamoDB
+        self.assertIsNone(client_map.get_client("remote-1"))
+        mock_dynamodb.Table.return_value.get_item.assert_not_called()
+
+        event = {
+            "requestContext": {
+                "connectionId": "remote-1",
+                "routeKey": "$default",
+                "domainName": "test.execute-api.us-east-1.amazonaws.com",
+            },
+            "body": json.dumps({"type": "set_language", "data": {"lang": "es"}}),
+        }
+        response = self.lambda_handler.lambda_handler(event, {})
+
+        self.assertEqual(response["statusCode"], 200)
+        mock_batch_write.assert_called_once_with(
+            RequestItems={
+                "test-connections": [
+                    {"PutRequest": {"Item": {"client_id": "remote-1", "lang": "es"}}}
+                ]
+            }
+        )
+        first_reply = json.loads(
+            mock_apigw.post_to_connection.call_args_list[0][1]["Data"]
+        )
+        self.assertEqual(first_reply["type"], "language_set")
+
+    @patch("lambda_handler.get_apigw_management_client")
+    def test_client_map_scanned_on_broadcast_only(self, mock_get_client):
+        """Test that broadcasts rescan DynamoDB at most once per interval."""
+        mock_apigw = Mock()
+        mock_get_client.return_value = mock_apigw
+        client_map, mock_dynamodb = self._dynamodb_client_map()
+        mock_scan = mock_dynamodb.Table.return_value.scan
+        mock_scan.return_value = {"Items": [{"client_id": "remote-1", "lang": "en"}]}
+
+        # Connecting needs no other clients
+        self.lambda_handler.lambda_handler(
+            {"requestContext": {"connectionId": "conn-1", "routeKey": "$connect"}},
+            {},
+        )
+        mock_scan.assert_not_called()
+
+        # Recipients connected through other containers are found on broadcast
+        event = {
+            "requestContext": {
+                "connectionId": "speaker",
+                "routeKey": "$default",
+                "domainName": "test.execute-api.us-east-1.amazonaws.com",
+            },
+            "body": json.dumps(
+                {
+                    "type": "new_text",
+                    "data": {"text": "Hello", "api_key": "test-api-key-123"},
+                }
+            ),
+        }
+        self.lambda_handler.lambda_handler(event, {})
+
+        mock_scan.assert_called_once()
+        sent_to = sorted(
+            c[1]["ConnectionId"] for c in mock_apigw.post_to_connection.call_args_list
+        )
+        # conn-1 was written by this container, so the scan can't drop it
+        self.assertEqual(sent_to, ["conn-1", "remote-1"])
+
+        # The next utterance within the interval reuses the cached view
+        self.lambda_handler.lambda_handler(event, {})
+        mock_scan.assert_called_once()
+
+    def test_services_created_lazily(self):
+        """Test that the connect route does not build the message handler."""
+        self.lambda_handler._message_handler.cache_clear()
+
+        with patch("lambda_handler.TranslationService") as mock_service:
+            event = {
+                "requestContext": {
+                    "connectionId": "test-connection-123",
+                    "routeKey": "$connect",
+                }
+            }
+            self.lambda_handler.lambda_handler(event, {})
+
+            mock_service.assert_not_called()
+            self.assertEqual(
+                self.lambda_handler._message_handler.cache_info().currsize, 0
+            )
 
     def test_get_apigw_management_client(self):
         """Test getting API Gateway management client."""
@@ -274,13 +510,46 @@ class TestLambdaHandler(unittest.TestCase):
                 }
             }
 
-            # Reset global client
-            self.lambda_handler.apigw_management_client = None
+            # Reset cached clients
+            self.lambda_handler.apigw_management_clients.clear()
 
             client = self.lambda_handler.get_apigw_management_client(event)
 
             self.assertIsNotNone(client)
             mock_boto_client.assert_called_once()
+            self.assertEqual(
+                mock_boto_client.call_args[1]["endpoint_url"],
+                "https://test.execute-api.us-east-1.amazonaws.com",
+            )
+            self.assertIs(
+                mock_boto_client.call_args[1]["config"],
+                self.lambda_handler.APIGW_CLIENT_CONFIG,
+            )
+
+            # Second lookup for the same endpoint reuses the cached client
+            self.assertIs(
+                self.lambda_handler.get_apigw_management_client(event), client
+            )
+            mock_boto_client.assert_called_once()
+
+    def test_get_apigw_management_client_precreated(self):
+        """Test that a client created at init is reused for its endpoint."""
+        with patch("lambda_handler.boto3.client") as mock_boto_client:
+            self.lambda_handler.apigw_management_clients.clear()
+            precreated = self.lambda_handler.create_apigw_management_client(
+                "https://test.execute-api.us-east-1.amazonaws.com"
+            )
+            mock_boto_client.reset_mock()
+
+            event = {
+                "requestContext": {
+                    "domainName": "test.execute-api.us-east-1.amazonaws.com",
+                }
+            }
+            client = self.lambda_handler.get_apigw_management_client(event)
+
+            self.assertIs(client, precreated)
+            mock_boto_client.assert_not_called()
 
 
 if __name__ == "__main__":
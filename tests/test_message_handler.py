@@ -3,27 +3,69 @@
 Unit tests for message handling logic.
 """
 
+import threading
 import unittest
-from unittest.mock import Mock, patch, MagicMock
-from message_handler import TranslationService, MessageHandler
-
-
+from unittest.mock import Mock, patch
+from client_map import TranslationClientMap
+from message_handler import (
+    REDIS_CACHE_TTL,
+    TRANSLATE_CLIENT_CONFIG,
+    TranslationService,
+    MessageHandler,
+    decode_message,
+    encode_message,
+    intern_message_type,
+)
+
+
+def _translations_by_client(result):
+    """Decode a handle_new_text result into client ID -> translation data."""
+    return {
+        client_id: decode_message(payload)["data"]
+        for payload, client_ids in result["payloads"].values()
+        for client_id in client_ids
+    }
+
+
+@patch("message_handler.boto3.client")
 class TestTranslationService(unittest.TestCase):
     """Test cases for TranslationService class."""
 
-    @patch("message_handler.boto3.client")
     def test_initialization_with_aws(self, mock_boto_client):
         """Test initialization when AWS is available."""
-        mock_translate = MagicMock()
+        mock_translate = Mock()
         mock_boto_client.return_value = mock_translate
 
         service = TranslationService("us-west-2")
 
         self.assertTrue(service.aws_available)
         self.assertIsNotNone(service.translate_client)
-        mock_boto_client.assert_called_once_with("translate", region_name="us-west-2")
+        mock_boto_client.assert_called_once_with(
+            "translate",
+            region_name="us-west-2",
+            endpoint_url=None,
+            config=TRANSLATE_CLIENT_CONFIG,
+        )
+
+    @patch.dict(
+        "os.environ", {"AWS_TRANSLATE_ENDPOINT_URL": "https://translate-fips.test"}
+    )
+    def test_initialization_with_endpoint_url(self, mock_boto_client):
+        """Test that AWS_TRANSLATE_ENDPOINT_URL is passed to the client."""
+        TranslationService("us-east-1")
+
+        self.assertEqual(
+            mock_boto_client.call_args[1]["endpoint_url"],
+            "https://translate-fips.test",
+        )
+
+    @patch.dict("os.environ", {"TRANSLATE_CACHE_SIZE": "16"})
+    def test_cache_size_from_environment(self, mock_boto_client):
+        """Test that TRANSLATE_CACHE_SIZE sets the cache size."""
+        service = TranslationService("us-east-1")
+
+        self.assertEqual(service.cache_info().maxsize, 16)
 
-    @patch("message_handler.boto3.client")
     def test_initialization_without_aws(self, mock_boto_client):
         """Test initialization when AWS is not available."""
         mock_boto_client.side_effect = Exception("No credentials")
@@ -33,10 +75,9 @@ class TestTranslationService(unittest.TestCase):
         self.assertFalse(service.aws_available)
         self.assertIsNone(service.translate_client)
 
-    @patch("message_handler.boto3.client")
     def test_translate_text_success(self, mock_boto_client):
         """Test successful text translation."""
-        mock_translate = MagicMock()
+        mock_translate = Mock()
         mock_translate.translate_text.return_value = {"TranslatedText": "Hola mundo"}
         mock_boto_client.return_value = mock_translate
 
@@ -50,10 +91,9 @@ class TestTranslationService(unittest.TestCase):
             TargetLanguageCode="es",
         )
 
-    @patch("message_handler.boto3.client")
     def test_translate_text_to_english(self, mock_boto_client):
         """Test that translating to English returns original text."""
-        mock_translate = MagicMock()
+        mock_translate = Mock()
         mock_boto_client.return_value = mock_translate
 
         service = TranslationService()
@@ -62,7 +102,18 @@ class TestTranslationService(unittest.TestCase):
         self.assertEqual(result, "Hello world")
         mock_translate.translate_text.assert_not_called()
 
-    @patch("message_handler.boto3.client")
+    def test_translate_text_blank_skips_aws(self, mock_boto_client):
+        """Test that empty or whitespace-only text isn't sent to AWS."""
+        mock_translate = Mock()
+        mock_boto_client.return_value = mock_translate
+
+        service = TranslationService()
+        for text in ("", "  ", " \n"):
+            with self.subTest(text=text):
+                self.assertEqual(service.translate_text(text, "es"), text)
+
+        mock_translate.translate_text.assert_not_called()
+
     def test_translate_text_without_aws(self, mock_boto_client):
         """Test translation when AWS is not available."""
         mock_boto_client.side_effect = Exception("No credentials")
@@ -72,10 +123,9 @@ class TestTranslationService(unittest.TestCase):
 
         self.assertEqual(result, "Hello world")
 
-    @patch("message_handler.boto3.client")
     def test_translate_text_with_error(self, mock_boto_client):
         """Test translation with AWS error."""
-        mock_translate = MagicMock()
+        mock_translate = Mock()
         mock_translate.translate_text.side_effect = Exception("Translation error")
         mock_boto_client.return_value = mock_translate
 
@@ -84,10 +134,72 @@ class TestTranslationService(unittest.TestCase):
 
         self.assertEqual(result, "Hello world")
 
-    @patch("message_handler.boto3.client")
+    def test_translate_text_cached(self, mock_boto_client):
+        """Test that repeated translations are served from the cache."""
+        mock_translate = Mock()
+        mock_translate.translate_text.return_value = {"TranslatedText": "Hola mundo"}
+        mock_boto_client.return_value = mock_translate
+
+        service = TranslationService()
+        self.assertEqual(service.translate_text("Hello world", "es"), "Hola mundo")
+        self.assertEqual(service.translate_text("Hello world", "es"), "Hola mundo")
+        service.translate_text("Hello world", "fr")
+
+        self.assertEqual(mock_translate.translate_text.call_count, 2)
+        self.assertEqual(service.cache_info().hits, 1)
+
+        service.cache_clear()
+        service.translate_text("Hello world", "es")
+        self.assertEqual(mock_translate.translate_text.call_count, 3)
+
+    def test_translate_text_error_not_cached(self, mock_boto_client):
+        """Test that failed translations are retried on the next call."""
+        mock_translate = Mock()
+        mock_translate.translate_text.side_effect = [
+            Exception("Translation error"),
+            {"TranslatedText": "Hola mundo"},
+        ]
+        mock_boto_client.return_value = mock_translate
+
+        service = TranslationService()
+        self.assertEqual(service.translate_text("Hello world", "es"), "Hello world")
+        self.assertEqual(service.translate_text("Hello world", "es"), "Hola mundo")
+
+    def test_translate_text_redis_cache(self, mock_boto_client):
+        """Test that the shared Redis cache is read before and filled after AWS."""
+        mock_translate = Mock()
+        mock_translate.translate_text.return_value = {"TranslatedText": "Hola mundo"}
+        mock_boto_client.return_value = mock_translate
+
+        service = TranslationService()
+        service.redis_client = Mock()
+        service.redis_client.get.side_effect = [None, "Bonjour".encode("utf-8")]
+
+        self.assertEqual(service.translate_text("Hello world", "es"), "Hola mundo")
+        key = service.redis_client.get.call_args[0][0]
+        service.redis_client.setex.assert_called_once_with(
+            key, REDIS_CACHE_TTL, "Hola mundo"
+        )
+
+        self.assertEqual(service.translate_text("Hello world", "fr"), "Bonjour")
+        self.assertEqual(mock_translate.translate_text.call_count, 1)
+
+    def test_translate_text_redis_error_falls_back(self, mock_boto_client):
+        """Test that an unreachable Redis doesn't stop translation."""
+        mock_translate = Mock()
+        mock_translate.translate_text.return_value = {"TranslatedText": "Hola mundo"}
+        mock_boto_client.return_value = mock_translate
+
+        service = TranslationService()
+        service.redis_client = Mock()
+        service.redis_client.get.side_effect = ConnectionError("down")
+
+        self.assertEqual(service.translate_text("Hello world", "es"), "Hola mundo")
+        service.redis_client.setex.assert_not_called()
+
     def test_is_available(self, mock_boto_client):
         """Test checking if AWS Translate is available."""
-        mock_translate = MagicMock()
+        mock_translate = Mock()
         mock_boto_client.return_value = mock_translate
 
         service = TranslationService()
@@ -99,6 +211,54 @@ class TestTranslationService(unittest.TestCase):
         self.assertFalse(service2.is_available())
 
 
+class TestInternMessageType(unittest.TestCase):
+    """Test cases for intern_message_type."""
+
+    def test_decoded_type_is_identical_to_constant(self):
+        """Test that a decoded type becomes the same object as the constant."""
+        msg_type = decode_message('{"type": "new_text"}')["type"]
+
+        self.assertIs(
+            intern_message_type(msg_type), MessageHandler.MESSAGE_TYPE_NEW_TEXT
+        )
+
+    def test_non_string_unchanged(self):
+        """Test that non-string types pass through untouched."""
+        self.assertIsNone(intern_message_type(None))
+        self.assertEqual(intern_message_type(5), 5)
+
+
+class TestMessageEncoding(unittest.TestCase):
+    """Test cases for JSON message encoding helpers."""
+
+    def test_encode_decode_roundtrip(self):
+        """Test that messages survive an encode/decode roundtrip."""
+        message = {"type": "translated_text", "data": {"text": "¡Hola mundo!"}}
+
+        payload = encode_message(message)
+
+        self.assertIsInstance(payload, bytes)
+        self.assertEqual(decode_message(payload), message)
+        self.assertEqual(decode_message(payload.decode("utf-8")), message)
+
+    @patch("message_handler.orjson", None)
+    def test_encode_decode_without_orjson(self):
+        """Test the standard library fallback when orjson is unavailable."""
+        message = {"type": "translated_text", "data": {"text": "¡Hola mundo!"}}
+
+        payload = encode_message(message)
+
+        self.assertIsInstance(payload, bytes)
+        self.assertEqual(decode_message(payload), message)
+
+    def test_decode_invalid_json(self):
+        """Test that invalid JSON raises json.JSONDecodeError."""
+        import json
+
+        with self.assertRaises(json.JSONDecodeError):
+            decode_message("not json")
+
+
 class TestMessageHandler(unittest.TestCase):
     """Test cases for MessageHandler class."""
 
@@ -118,6 +278,12 @@ class TestMessageHandler(unittest.TestCase):
         result = self.handler.validate_api_key("wrong-key")
         self.assertFalse(result)
 
+    def test_validate_api_key_different_length(self):
+        """Test API key validation with a prefix or extension of the key."""
+        self.assertFalse(self.handler.validate_api_key("test-api-key"))
+        self.assertFalse(self.handler.validate_api_key("test-api-key-12345-extra"))
+        self.assertFalse(self.handler.validate_api_key(""))
+
     def test_validate_api_key_no_key_configured(self):
         """Test API key validation when no key is configured."""
         handler = MessageHandler(self.mock_translation_service, None)
@@ -145,38 +311,105 @@ class TestMessageHandler(unittest.TestCase):
         self.assertEqual(response["type"], self.handler.MESSAGE_TYPE_ERROR)
         self.assertIn("Failed", response["data"]["message"])
 
-    def test_handle_new_text_unauthorized(self):
-        """Test handling new text with invalid API key."""
-        mock_client_map = Mock()
-
-        result = self.handler.handle_new_text(
-            "Hello", "2024-01-01", "wrong-key", mock_client_map
-        )
-
-        self.assertEqual(result["status"], "error")
-        self.assertIn("Unauthorized", result["error"])
-
     def test_handle_new_text_success(self):
-        """Test handling new text with valid API key."""
-        mock_client_map = Mock()
-        mock_client_map.get_all_clients.return_value = {
-            "client1": {"lang": "en", "ws": Mock()},
-            "client2": {"lang": "es", "ws": Mock()},
-        }
+        """Test handling new text from an authorized sender."""
+        client_map = TranslationClientMap()
+        client_map.add_client("client1", "en", Mock())
+        client_map.add_client("client2", "es", Mock())
         self.mock_translation_service.translate_text.return_value = "Hola"
 
-        result = self.handler.handle_new_text(
-            "Hello", "2024-01-01", "test-api-key-12345", mock_client_map
-        )
+        result = self.handler.handle_new_text("Hello", "2024-01-01", client_map)
 
         self.assertEqual(result["status"], "success")
-        self.assertEqual(len(result["translations"]), 2)
-        self.assertEqual(result["translations"][0]["translation"]["text"], "Hello")
-        self.assertEqual(result["translations"][1]["translation"]["text"], "Hola")
+        by_client = _translations_by_client(result)
+        self.assertEqual(len(by_client), 2)
+        self.assertEqual(by_client["client1"]["text"], "Hello")
+        self.assertEqual(by_client["client2"]["text"], "Hola")
         self.mock_translation_service.translate_text.assert_called_once_with(
             "Hello", "es"
         )
 
+    def test_handle_new_text_translates_once_per_language(self):
+        """Test that clients sharing a language share one translation."""
+        client_map = TranslationClientMap()
+        client_map.add_client("client1", "es", Mock())
+        client_map.add_client("client2", "fr", Mock())
+        client_map.add_client("client3", "es", Mock())
+        self.mock_translation_service.translate_text.side_effect = (
+            lambda text, lang: f"{text} ({lang})"
+        )
+
+        result = self.handler.handle_new_text("Hello", "2024-01-01", client_map)
+
+        self.assertEqual(self.mock_translation_service.translate_text.call_count, 2)
+        by_client = _translations_by_client(result)
+        self.assertEqual(set(by_client), {"client1", "client2", "client3"})
+        self.assertEqual(by_client["client1"]["text"], "Hello (es)")
+        self.assertEqual(by_client["client2"]["text"], "Hello (fr)")
+        self.assertEqual(by_client["client1"], by_client["client3"])
+
+        # One pre-encoded message per language
+        payload, client_ids = result["payloads"]["es"]
+        self.assertEqual(client_ids, ("client1", "client3"))
+        self.assertEqual(
+            decode_message(payload),
+            {"type": "translated_text", "data": by_client["client1"]},
+        )
+
+    def test_handle_new_text_translates_languages_concurrently(self):
+        """Test that per-language translations run in parallel."""
+        client_map = TranslationClientMap()
+        client_map.add_client("client1", "es", Mock())
+        client_map.add_client("client2", "fr", Mock())
+        # Each call blocks until the other has started; sequential calls
+        # would break the barrier
+        barrier = threading.Barrier(2, timeout=5)
+
+        def translate(text, lang):
+            barrier.wait()
+            return f"{text} ({lang})"
+
+        self.mock_translation_service.translate_text.side_effect = translate
+
+        result = self.handler.handle_new_text("Hello", "2024-01-01", client_map)
+
+        texts = {t["text"] for t in _translations_by_client(result).values()}
+        self.assertEqual(texts, {"Hello (es)", "Hello (fr)"})
+
+    @patch("message_handler.TRANSLATE_RESULT_TIMEOUT", 0.05)
+    def test_handle_new_text_translation_timeout(self):
+        """Test that a slow translation falls back to the original text."""
+        client_map = TranslationClientMap()
+        client_map.add_client("client1", "es", Mock())
+        client_map.add_client("client2", "fr", Mock())
+        release = threading.Event()
+        self.addCleanup(release.set)
+
+        def translate(text, lang):
+            if lang == "fr":
+                release.wait(5)
+            return f"{text} ({lang})"
+
+        self.mock_translation_service.translate_text.side_effect = translate
+
+        result = self.handler.handle_new_text("Hello", "2024-01-01", client_map)
+
+        texts = {
+            client_id: t["text"]
+            for client_id, t in _translations_by_client(result).items()
+        }
+        self.assertEqual(texts, {"client1": "Hello (es)", "client2": "Hello"})
+
+    def test_handle_new_text_blank_not_translated(self):
+        """Test that whitespace-only text is passed through untranslated."""
+        client_map = TranslationClientMap()
+        client_map.add_client("client1", "es", Mock())
+
+        result = self.handler.handle_new_text(" ", "2024-01-01", client_map)
+
+        self.assertEqual(_translations_by_client(result)["client1"]["text"], " ")
+        self.mock_translation_service.translate_text.assert_not_called()
+
     def test_handle_request_translation(self):
         """Test handling on-demand translation request."""
         self.mock_translation_service.translate_text.return_value = "Bonjour monde"
@@ -230,7 +463,7 @@ class TestMessageHandler(unittest.TestCase):
     def test_handle_generate_token_success(self):
         """Test successful token generation via WebSocket message."""
         # Mock token generator
-        mock_token_gen = MagicMock()
+        mock_token_gen = Mock()
         mock_token_gen.generate_token.return_value = {
             "status": "success",
             "credentials": {
@@ -253,7 +486,7 @@ class TestMessageHandler(unittest.TestCase):
 
     def test_handle_generate_token_invalid_key(self):
         """Test token generation with invalid API key."""
-        mock_token_gen = MagicMock()
+        mock_token_gen = Mock()
         handler = MessageHandler(
             self.mock_translation_service, "test-api-key", mock_token_gen
         )
@@ -272,7 +505,7 @@ class TestMessageHandler(unittest.TestCase):
 
     def test_handle_generate_token_generation_error(self):
         """Test token generation when generator returns error."""
-        mock_token_gen = MagicMock()
+        mock_token_gen = Mock()
         mock_token_gen.generate_token.return_value = {
             "status": "error",
             "error": "Failed to assume role",
@@ -4,19 +4,19 @@ Unit tests for the TokenGenerator class.
 """
 
 import unittest
-from unittest.mock import patch, MagicMock
+from unittest.mock import Mock, patch
 from datetime import datetime, timezone
 from botocore.exceptions import ClientError, NoCredentialsError
 from token_generator import TokenGenerator
 
 
+@patch("token_generator.boto3.client")
 class TestTokenGenerator(unittest.TestCase):
     """Test cases for TokenGenerator class."""
 
-    @patch("token_generator.boto3.client")
     def test_initialization_with_role_arn(self, mock_boto_client):
         """Test successful initialization with role ARN."""
-        mock_sts = MagicMock()
+        mock_sts = Mock()
         mock_boto_client.return_value = mock_sts
 
         generator = TokenGenerator(
@@ -29,7 +29,6 @@ class TestTokenGenerator(unittest.TestCase):
         self.assertEqual(generator.region_name, "us-east-1")
         mock_boto_client.assert_called_once_with("sts", region_name="us-east-1")
 
-    @patch("token_generator.boto3.client")
     def test_initialization_without_role_arn(self, mock_boto_client):
         """Test initialization without role ARN."""
         generator = TokenGenerator(role_arn=None, region_name="us-east-1")
@@ -38,10 +37,9 @@ class TestTokenGenerator(unittest.TestCase):
         self.assertIsNone(generator.role_arn)
         mock_boto_client.assert_not_called()
 
-    @patch("token_generator.boto3.client")
     def test_initialization_with_env_var(self, mock_boto_client):
         """Test initialization with role ARN from environment variable."""
-        mock_sts = MagicMock()
+        mock_sts = Mock()
         mock_boto_client.return_value = mock_sts
 
         with patch.dict(
@@ -55,7 +53,6 @@ class TestTokenGenerator(unittest.TestCase):
                 generator.role_arn, "arn:aws:iam::123456789012:role/EnvRole"
             )
 
-    @patch("token_generator.boto3.client")
     def test_initialization_no_credentials(self, mock_boto_client):
         """Test initialization fails gracefully without AWS credentials."""
         mock_boto_client.side_effect = NoCredentialsError()
@@ -67,10 +64,9 @@ class TestTokenGenerator(unittest.TestCase):
 
         self.assertFalse(generator.is_available())
 
-    @patch("token_generator.boto3.client")
     def test_generate_token_success(self, mock_boto_client):
         """Test successful token generation."""
-        mock_sts = MagicMock()
+        mock_sts = Mock()
         mock_boto_client.return_value = mock_sts
 
         # Mock assume_role response
@@ -107,10 +103,9 @@ class TestTokenGenerator(unittest.TestCase):
         self.assertEqual(call_args[1]["RoleSessionName"], "test-session")
         self.assertEqual(call_args[1]["DurationSeconds"], 3600)
 
-    @patch("token_generator.boto3.client")
     def test_generate_token_auto_session_name(self, mock_boto_client):
         """Test token generation with auto-generated session name."""
-        mock_sts = MagicMock()
+        mock_sts = Mock()
         mock_boto_client.return_value = mock_sts
 
         expiration = datetime(2024, 12, 31, 23, 59, 59, tzinfo=timezone.utc)
@@ -138,7 +133,6 @@ class TestTokenGenerator(unittest.TestCase):
         session_name = call_args[1]["RoleSessionName"]
         self.assertTrue(session_name.startswith("live-translate-"))
 
-    @patch("token_generator.boto3.client")
     def test_generate_token_not_available(self, mock_boto_client):
         """Test token generation when service is not available."""
         generator = TokenGenerator(role_arn=None, region_name="us-east-1")
@@ -149,10 +143,9 @@ class TestTokenGenerator(unittest.TestCase):
         self.assertIn("error", result)
         self.assertIn("not configured", result["error"])
 
-    @patch("token_generator.boto3.client")
     def test_generate_token_client_error(self, mock_boto_client):
         """Test token generation with AWS client error."""
-        mock_sts = MagicMock()
+        mock_sts = Mock()
         mock_boto_client.return_value = mock_sts
 
         # Mock client error
@@ -172,10 +165,9 @@ class TestTokenGenerator(unittest.TestCase):
         self.assertIn("error", result)
         self.assertIn("User is not authorized", result["error"])
 
-    @patch("token_generator.boto3.client")
     def test_generate_token_unexpected_error(self, mock_boto_client):
         """Test token generation with unexpected error."""
-        mock_sts = MagicMock()
+        mock_sts = Mock()
         mock_boto_client.return_value = mock_sts
 
         mock_sts.assume_role.side_effect = Exception("Unexpected error")
@@ -191,10 +183,9 @@ class TestTokenGenerator(unittest.TestCase):
         self.assertIn("error", result)
         self.assertIn("Unexpected error", result["error"])
 
-    @patch("token_generator.boto3.client")
     def test_session_duration_max_limit(self, mock_boto_client):
         """Test that session duration is capped at 3600 seconds."""
-        mock_sts = MagicMock()
+        mock_sts = Mock()
         mock_boto_client.return_value = mock_sts
 
         # Try to set duration longer than max
@@ -206,10 +197,9 @@ class TestTokenGenerator(unittest.TestCase):
 
         self.assertEqual(generator.session_duration, 3600)  # Should be capped to 1 hour
 
-    @patch("token_generator.boto3.client")
     def test_is_available_true(self, mock_boto_client):
         """Test is_available returns True when properly configured."""
-        mock_sts = MagicMock()
+        mock_sts = Mock()
         mock_boto_client.return_value = mock_sts
 
         generator = TokenGenerator(
@@ -219,14 +209,12 @@ class TestTokenGenerator(unittest.TestCase):
 
         self.assertTrue(generator.is_available())
 
-    @patch("token_generator.boto3.client")
     def test_is_available_false_no_role(self, mock_boto_client):
         """Test is_available returns False without role ARN."""
         generator = TokenGenerator(role_arn=None, region_name="us-east-1")
 
         self.assertFalse(generator.is_available())
 
-    @patch("token_generator.boto3.client")
     def test_is_available_false_no_credentials(self, mock_boto_client):
         """Test is_available returns False without credentials."""
         mock_boto_client.side_effect = NoCredentialsError()
@@ -7,6 +7,7 @@ Validates that environment variables are properly loaded and sanitized.
 import os
 import sys
 import html
+import tempfile
 import unittest
 
 # Set test environment variables
@@ -67,6 +68,23 @@ class TestUICustomization(unittest.TestCase):
             default_contact, "your support team", "Default contact not correct"
         )
 
+    def test_config_endpoint_from_environment(self):
+        """Test that config.json is served from ui_config without a static file."""
+        from server import app
+
+        # Empty static folder, so there is no config.json to serve
+        static_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(static_dir.cleanup)
+        original = app.static_folder
+        app.static_folder = static_dir.name
+        self.addCleanup(setattr, app, "static_folder", original)
+
+        response = app.test_client().get("/config.json")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, "application/json")
+        self.assertEqual(response.get_json(), ui_config)
+
 
 if __name__ == "__main__":
     # Run the unittest test runner
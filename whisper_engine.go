@@ -19,6 +19,11 @@ const (
 
 	// whisperWindowSamples = sampleRate * whisperWindowSeconds
 	whisperWindowSamples = sampleRate * whisperWindowSeconds
+
+	// whisperSilenceRMS is the RMS level (in int16 units, about -50 dBFS)
+	// below which a window is treated as silence and skipped without running
+	// inference.  Quiet speech sits well above this.
+	whisperSilenceRMS = 100
 )
 
 // WhisperEngine implements TranscriptionEngine using a local whisper.cpp model.
@@ -86,7 +91,7 @@ func (e *WhisperEngine) Start(ctx context.Context, audioIn <-chan []int16) (<-ch
 			case samples, ok := <-audioIn:
 				if !ok {
 					// Channel closed — process leftover audio
-					if len(buf) > 0 {
+					if len(buf) > 0 && !isSilentWindow(buf) {
 						e.processWindow(ctx, wCtx, int16ToFloat32(buf), out)
 					}
 					return
@@ -98,6 +103,11 @@ func (e *WhisperEngine) Start(ctx context.Context, audioIn <-chan []int16) (<-ch
 					window := buf[:whisperWindowSamples]
 					buf = buf[whisperWindowSamples:]
 
+					// Silent windows only ever produce noise tokens; skip the
+					// (CPU-heavy) inference for them entirely.
+					if isSilentWindow(window) {
+						continue
+					}
 					e.processWindow(ctx, wCtx, int16ToFloat32(window), out)
 				}
 			}
@@ -152,6 +162,20 @@ func int16ToFloat32(samples []int16) []float32 {
 	return out
 }
 
+// isSilentWindow reports whether the RMS level of samples is below
+// whisperSilenceRMS.  Mean square is compared against the squared threshold
+// so no square root is needed.
+func isSilentWindow(samples []int16) bool {
+	if len(samples) == 0 {
+		return true
+	}
+	var sumSquares int64
+	for _, s := range samples {
+		sumSquares += int64(s) * int64(s)
+	}
+	return sumSquares/int64(len(samples)) < whisperSilenceRMS*whisperSilenceRMS
+}
+
 // suppressStderr redirects the OS-level file descriptor 2 (stderr) to
 // /dev/null and returns a restore function.  This is used to silence verbose
 // diagnostic output emitted directly by the C whisper.cpp library during